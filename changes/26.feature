@@ -0,0 +1 @@
+Add django-debug-toolbar panel showing page meta lookups, timings and queries
@@ -0,0 +1 @@
+Add Prometheus metrics for page meta lookups, invalidations and toolbar rendering
@@ -0,0 +1 @@
+Log page meta builds slower than PAGE_META_SLOW_BUILD_THRESHOLD with phase timings and queries
@@ -0,0 +1 @@
+Add page_meta_cache_report command to report the cache footprint of page meta entries
@@ -0,0 +1 @@
+Include a fingerprint of django-meta settings and a cache schema version in the page meta cache keys
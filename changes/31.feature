@@ -0,0 +1 @@
+Cache only page-specific meta attributes and merge site-wide defaults at read time
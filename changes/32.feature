@@ -0,0 +1 @@
+Cache language-independent and language-dependent page meta separately, so that editing PageMeta invalidates a single entry
@@ -0,0 +1 @@
+Share page meta cache entries between languages resolved to the same fallback language
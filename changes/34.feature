@@ -0,0 +1 @@
+Cache a per-site index of meta extensions to skip extension queries when building the meta of pages without them
@@ -0,0 +1 @@
+Add PAGE_META_SNAPSHOT mode serving page meta from an in-process snapshot reloaded on a shared version counter
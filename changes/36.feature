@@ -0,0 +1 @@
+Add page_meta_export_artifact command and PAGE_META_ARTIFACT setting to serve page meta from a memory-mapped file
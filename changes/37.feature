@@ -0,0 +1 @@
+Add PAGE_META_CACHE setting to store page meta in a dedicated cache alias
@@ -0,0 +1 @@
+Add PAGE_META_COMPRESSION and PAGE_META_COMPRESSION_THRESHOLD settings to compress big cached entries
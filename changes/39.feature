@@ -0,0 +1 @@
+Add PAGE_META_WRITE_THROUGH setting to rebuild invalidated cache entries after commit, synchronously or in a background thread
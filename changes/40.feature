@@ -0,0 +1 @@
+Collect page meta cache invalidations per transaction and delete the keys once on commit
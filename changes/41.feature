@@ -0,0 +1 @@
+Invalidate the cached meta of the whole page subtree when a page is moved or its URL changes
@@ -0,0 +1 @@
+Invalidate the cached meta of deleted page trees with a single query
@@ -0,0 +1 @@
+Invalidate the cached meta of the pages using a filer file when the file is changed or deleted
@@ -0,0 +1 @@
+Expire the cached meta of scheduled pages at their next publication boundary and add PAGE_META_CACHE_TIMEOUT setting
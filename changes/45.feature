@@ -0,0 +1 @@
+Fetch djangocms-page-tags tags with a single query and invalidate the cached meta when tags change
@@ -0,0 +1 @@
+Bypass the cache in toolbar edit and preview mode and refresh the public meta on djangocms-versioning publish
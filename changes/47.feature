@@ -0,0 +1 @@
+Memoize the page meta on the request
@@ -0,0 +1 @@
+Add lazy option to page_meta templatetag and page_meta_field templatetag
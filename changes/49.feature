@@ -0,0 +1 @@
+Add page_meta_list templatetag to resolve the meta of several pages in a single batch
@@ -0,0 +1 @@
+Add menu modifier attaching page meta attributes to navigation nodes and PAGE_META_MENU_FIELDS setting
@@ -76,7 +76,10 @@ HELPER_SETTINGS = dict(
         "filer.thumbnail_processors.scale_and_crop_with_subject_location",
         "easy_thumbnails.processors.filters",
     ),
-    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "page_meta": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "page_meta"},
+    },
     FILE_UPLOAD_TEMP_DIR=mkdtemp(),
 )
 
@@ -6,3 +6,20 @@ class PageMetaConfig(AppConfig):
     name = "djangocms_page_meta"
     verbose_name = _("django CMS Page Meta")
     default_auto_field = "django.db.models.BigAutoField"
+
+    def ready(self):
+        from .models import connect_images, connect_tags, connect_versioning
+        from .settings import get_setting
+
+        connect_images()
+        connect_tags()
+        connect_versioning()
+
+        if get_setting("METRICS"):
+            from . import metrics
+
+            metrics.connect()
+        if get_setting("SNAPSHOT"):
+            from . import snapshot
+
+            snapshot.connect()
@@ -0,0 +1,176 @@
+"""
+Prebuilt page meta artifact.
+
+The ``page_meta_export_artifact`` command writes the page-specific attributes of all the pages and languages in a
+single binary file; when :ref:`PAGE_META_ARTIFACT` points to it,
+:py:func:`djangocms_page_meta.utils.get_page_meta` reads the entries from the memory-mapped file, without database
+or cache access. As the file is mapped read-only, the operating system shares its pages among all the processes.
+
+File layout (little endian):
+
+* header: magic, format version, length of the metadata, number of records;
+* metadata: pickled dictionary with the languages, the default image URL and the cache layout fingerprint;
+* index: fixed size records (site id, page id, language index, offset, length) sorted by site, page and language;
+* data: pickled attributes, merged from the language-independent and language-dependent ones.
+"""
+
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PAGEMETA"
+
+#: Version of the file layout
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHII")
+RECORD = struct.Struct("<IQHQI")
+
+
+class _RecordKeys:
+    """
+    Sequence of the (site id, page id, language index) keys of the index records, for binary search.
+    """
+
+    def __init__(self, buffer, offset, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position):
+        return RECORD.unpack_from(self.buffer, self.offset + position * RECORD.size)[:3]
+
+
+class Artifact:
+    """
+    Read-only access to a page meta artifact.
+
+    :param path: path of the artifact file
+    """
+
+    def __init__(self, path):
+        from .utils import get_schema_fingerprint
+
+        self.path = path
+        with open(path, "rb") as fileobj:
+            self.buffer = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, metadata_length, count = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError("{} is not a page meta artifact of version {}".format(path, FORMAT_VERSION))
+        metadata = pickle.loads(self.buffer[HEADER.size : HEADER.size + metadata_length])
+        self.languages = {language: position for position, language in enumerate(metadata["languages"])}
+        self.default_image = metadata["default_image"]
+        if metadata["fingerprint"] != get_schema_fingerprint():
+            logger.warning("Page meta artifact %s has been built with a different cache layout", path)
+        self.keys = _RecordKeys(self.buffer, HEADER.size + metadata_length, count)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def close(self):
+        self.buffer.close()
+
+    def get(self, site_id, page_id, language):
+        """
+        Return the page-specific attributes of the page in the given language.
+
+        :return: dictionary of attributes or ``None`` if the page is not in the artifact
+        """
+        key = (site_id, page_id, self.languages.get(language, -1))
+        position = bisect_left(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key:
+            return None
+        offset, length = RECORD.unpack_from(self.buffer, self.keys.offset + position * RECORD.size)[3:]
+        with memoryview(self.buffer) as view:
+            return pickle.loads(view[offset : offset + length])
+
+
+def write_artifact(path, pages=None):
+    """
+    Build the page-specific attributes of the given pages (all the pages by default) and write them to ``path``.
+
+    The file is written to a temporary file first and then moved to ``path``, so that processes which already
+    mapped the previous version keep reading a consistent file.
+
+    :param pages: Page queryset
+    :return: number of entries written
+    """
+    from .utils import _get_default_image, _merge_overlays, get_schema_fingerprint, iter_page_overlays
+
+    languages = []
+    records = []
+    data = []
+    for page, site_id, page_overlay, title_overlays in iter_page_overlays(pages):
+        for language, title_overlay in title_overlays.items():
+            if language not in languages:
+                languages.append(language)
+            overlay = dict(_merge_overlays(page_overlay, title_overlay))
+            data.append(pickle.dumps(overlay, pickle.HIGHEST_PROTOCOL))
+            records.append((site_id, page.pk, languages.index(language)))
+    metadata = pickle.dumps(
+        {"languages": languages, "default_image": _get_default_image({}), "fingerprint": get_schema_fingerprint()},
+        pickle.HIGHEST_PROTOCOL,
+    )
+    offset = HEADER.size + len(metadata) + RECORD.size * len(records)
+    index = []
+    for key, entry in zip(records, data):
+        index.append((key, offset, len(entry)))
+        offset += len(entry)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".page_meta_artifact")
+    try:
+        with os.fdopen(descriptor, "wb") as fileobj:
+            fileobj.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata), len(records)))
+            fileobj.write(metadata)
+            for key, entry_offset, length in sorted(index):
+                fileobj.write(RECORD.pack(*key, entry_offset, length))
+            for entry in data:
+                fileobj.write(entry)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(records)
+
+
+@lru_cache(maxsize=None)
+def get_artifact():
+    """
+    Return the artifact configured in :ref:`PAGE_META_ARTIFACT`, mapped once per process.
+
+    A missing or unreadable file is logged once: page meta is then read from the cache.
+
+    :return: Artifact instance or ``None`` if not configured or not readable
+    """
+    path = get_setting("ARTIFACT")
+    if not path:
+        return None
+    try:
+        return Artifact(path)
+    except (OSError, ValueError, struct.error, pickle.UnpicklingError) as e:
+        logger.warning("Page meta artifact %s cannot be read, falling back to the cache: %s", path, e)
+        return None
+
+
+@receiver(setting_changed)
+def _reset_artifact(sender, setting, **kwargs):
+    if setting == "PAGE_META_ARTIFACT":
+        get_artifact.cache_clear()
@@ -0,0 +1,46 @@
+from cms.models import Page
+from cms.utils import get_language_from_request
+from menus.base import Modifier
+from menus.menu_pool import menu_pool
+
+from .settings import get_setting
+from .utils import get_page_meta_many
+
+
+def _iter_nodes(nodes):
+    for node in nodes:
+        yield node
+        yield from _iter_nodes(node.children)
+
+
+class PageMetaModifier(Modifier):
+    """
+    Attach the meta attributes listed in :ref:`PAGE_META_MENU_FIELDS` to the page nodes as ``node.attr["page_meta"]``.
+
+    Only the nodes being rendered are handled (the nodes left after cutting the menu tree, or the selected node and
+    its ancestors for breadcrumbs), resolving their meta with a single batch.
+    """
+
+    def modify(self, request, nodes, namespace, root_id, post_cut, breadcrumb):
+        fields = get_setting("MENU_FIELDS")
+        if not fields:
+            return nodes
+        if post_cut:
+            page_nodes = _iter_nodes(nodes)
+        elif breadcrumb:
+            page_nodes = (node for node in nodes if node.selected or node.ancestor)
+        else:
+            return nodes
+        page_nodes = [node for node in page_nodes if node.attr.get("is_page") and "page_meta" not in node.attr]
+        if not page_nodes:
+            return nodes
+        pages = Page.objects.in_bulk({node.id for node in page_nodes})
+        language = get_language_from_request(request)
+        metas = dict(zip(pages, get_page_meta_many(pages.values(), language, request)))
+        for node in page_nodes:
+            meta = metas.get(node.id)
+            node.attr["page_meta"] = {field: getattr(meta, field, None) for field in fields} if meta else {}
+        return nodes
+
+
+menu_pool.register_modifier(PageMetaModifier)
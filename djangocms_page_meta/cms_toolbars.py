@@ -1,3 +1,5 @@
+from time import perf_counter
+
 from cms.api import get_page_draft
 from cms.cms_toolbars import PAGE_MENU_SECOND_BREAK
 from cms.toolbar.items import Break
@@ -9,6 +11,8 @@ from django.urls import NoReverseMatch, reverse
 from django.utils.translation import gettext_lazy as _
 
 from .models import DefaultMetaImage, PageMeta, TitleMeta
+from .signals import has_query_consumers, toolbar_populated
+from .utils import capture_queries
 
 try:
     from cms.utils import get_cms_setting
@@ -24,6 +28,19 @@ PAGE_META_DEFAULT_META_IMAGE_TITLE = _("Default meta image")
 @toolbar_pool.register
 class PageToolbarMeta(CMSToolbar):
     def populate(self):
+        if not toolbar_populated.has_listeners():
+            return self._populate()
+        start = perf_counter()
+        with capture_queries(enabled=has_query_consumers()) as recorder:
+            self._populate()
+        toolbar_populated.send(
+            sender=self.__class__,
+            request=self.request,
+            duration=perf_counter() - start,
+            queries=recorder.queries,
+        )
+
+    def _populate(self):
         # django CMS <5: get_page_draft returns the draft page.
         # django CMS 5 (with versioning): API is removed and may return None.
         self.page = get_page_draft(self.request.current_page)
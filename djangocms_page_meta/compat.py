@@ -1,5 +1,66 @@
+from functools import lru_cache
+
+from django.apps import apps
+
+
 def get_page_title_obj(page, language):
     """Returns title/content object for current CMS version."""
     if hasattr(page, "get_content_obj"):
         return page.get_content_obj(language=language, fallback=True)
     return page.get_title_obj(language)
+
+
+@lru_cache(maxsize=None)
+def get_page_tags_models():
+    """
+    Returns djangocms-page-tags extension models (PageTags, TitleTags), ``None`` if not installed.
+
+    Resolved once per process, when the application is loaded.
+    """
+    if not apps.is_installed("djangocms_page_tags"):
+        return None
+    return apps.get_model("djangocms_page_tags", "PageTags"), apps.get_model("djangocms_page_tags", "TitleTags")
+
+
+def is_draft_content(content):
+    """
+    Returns whether the page content is a djangocms-versioning draft, always ``False`` if versioning is not installed.
+    """
+    if not apps.is_installed("djangocms_versioning"):
+        return False
+    from djangocms_versioning.constants import DRAFT
+    from djangocms_versioning.models import Version
+
+    try:
+        return Version.objects.get_for_content(content).state == DRAFT
+    except (Version.DoesNotExist, KeyError):
+        # content not versioned or version not created yet
+        return False
+
+
+def get_publication_dates(page):
+    """
+    Returns the dates when the public content of the page changes.
+
+    These are the ``publication_date`` and ``publication_end_date`` of the page on django CMS < 4, and the visibility
+    intervals of the published page contents with djangocms-timed-publishing; django CMS 4+ without
+    djangocms-timed-publishing has no scheduled publishing.
+
+    :return: list of dates
+    """
+    dates = [getattr(page, "publication_date", None), getattr(page, "publication_end_date", None)]
+    if apps.is_installed("djangocms_timed_publishing"):
+        from django.contrib.contenttypes.models import ContentType
+        from djangocms_timed_publishing.models import TimedPublishingInterval
+        from djangocms_versioning.constants import PUBLISHED
+
+        PageContent = apps.get_model("cms", "PageContent")
+        intervals = TimedPublishingInterval.objects.filter(
+            version__state=PUBLISHED,
+            version__content_type=ContentType.objects.get_for_model(PageContent),
+            # the default manager hides the contents not visible yet
+            version__object_id__in=PageContent.admin_manager.filter(page=page).values("pk"),
+        ).values_list("start", "end")
+        for start, end in intervals:
+            dates.extend((start, end))
+    return [date for date in dates if date]
@@ -0,0 +1,71 @@
+import pickle
+
+from cms.models import Page
+from cms.utils.i18n import get_language_list
+from django.core.management.base import BaseCommand
+
+from djangocms_page_meta.utils import decompress_entry, get_cache, get_cache_key, get_page_cache_key
+
+DESCRIPTION_FIELDS = ("description", "og_description", "twitter_description", "schemaorg_description")
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class Command(BaseCommand):
+    help = "Report the number and size of the page meta entries stored in the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--site", type=int, help="Only report pages of the given site id.")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Number of keys fetched per cache request.")
+        parser.add_argument("--top", type=int, default=10, help="Number of biggest entries to list.")
+
+    def _get_keys(self, site_id):
+        pages = Page.objects.all()
+        if site_id:
+            pages = pages.filter(site_id=site_id)
+        languages = {}
+        keys = []
+        for page in pages.only("pk", "site_id").order_by("pk").iterator():
+            if page.site_id not in languages:
+                languages[page.site_id] = get_language_list(page.site_id)
+            keys.append((get_page_cache_key(page), page.pk, "all languages"))
+            for language in languages[page.site_id]:
+                keys.append((get_cache_key(page, language), page.pk, language))
+        return keys
+
+    def handle(self, *args, **options):
+        keys = self._get_keys(options["site"])
+        cache = get_cache()
+        entries = []
+        for chunk in _chunks(keys, options["chunk_size"]):
+            values = cache.get_many([key for key, __, __ in chunk])
+            for key, page_id, language in chunk:
+                if key not in values:
+                    continue
+                entry = decompress_entry(values[key])
+                entries.append(
+                    {
+                        "page": page_id,
+                        "language": language,
+                        "size": len(pickle.dumps(values[key], pickle.HIGHEST_PROTOCOL)),
+                        "descriptions": sum(len(entry.get(field) or "") for field in DESCRIPTION_FIELDS),
+                        "extra": len(entry.get("extra_custom_props") or []),
+                    }
+                )
+
+        total = sum(entry["size"] for entry in entries)
+        self.stdout.write("Cached entries: {} / {} keys".format(len(entries), len(keys)))
+        self.stdout.write("Total size: {} bytes".format(total))
+        if not entries:
+            return
+        self.stdout.write("Average size: {:.0f} bytes".format(total / len(entries)))
+        self.stdout.write("Max size: {} bytes".format(max(entry["size"] for entry in entries)))
+        self.stdout.write("Biggest entries:")
+        for entry in sorted(entries, key=lambda item: item["size"], reverse=True)[: options["top"]]:
+            self.stdout.write(
+                "  page {page} ({language}): {size} bytes, {descriptions} description chars, "
+                "{extra} extra attributes".format(**entry)
+            )
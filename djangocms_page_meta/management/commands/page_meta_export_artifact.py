@@ -0,0 +1,19 @@
+from cms.models import Page
+from django.core.management.base import BaseCommand
+
+from djangocms_page_meta.artifact import write_artifact
+
+
+class Command(BaseCommand):
+    help = "Export the page meta of all the pages and languages to a memory-mappable artifact file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the artifact file.")
+        parser.add_argument("--site", type=int, help="Only export pages of the given site id.")
+
+    def handle(self, *args, **options):
+        pages = Page.objects.all()
+        if options["site"]:
+            pages = pages.filter(site_id=options["site"])
+        count = write_artifact(options["path"], pages)
+        self.stdout.write("Exported {} entries to {}".format(count, options["path"]))
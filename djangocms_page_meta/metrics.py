@@ -0,0 +1,193 @@
+from .signals import page_meta_invalidated, page_meta_resolved, toolbar_populated
+from .utils import get_cache
+
+METRICS_KEY_PREFIX = "djangocms_page_meta:metrics"
+#: Histogram sums are stored as integers in this unit (microseconds for durations)
+SUM_SCALE = 1000000
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _incr(key, amount=1):
+    """
+    Atomically increment ``key``, creating it if missing.
+    """
+    cache = get_cache()
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join('{}="{}"'.format(name, value) for name, value in labels)
+
+
+class Counter:
+    """
+    Monotonic counter with an optional label whose values are known in advance.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, label=None, values=()):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.values = values if label else (None,)
+
+    def _key(self, value):
+        return "{}:{}:{}".format(METRICS_KEY_PREFIX, self.name, value or "")
+
+    def keys(self):
+        return [self._key(value) for value in self.values]
+
+    def inc(self, amount=1, value=None):
+        _incr(self._key(value), amount)
+
+    def samples(self, data):
+        for value in self.values:
+            labels = ((self.label, value),) if self.label else ()
+            yield "{}{} {}".format(self.name, _format_labels(labels), data.get(self._key(value)) or 0)
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets.
+
+    Each bucket count is stored non-cumulatively and summed up when rendering.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, scale=SUM_SCALE):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + ("+Inf",)
+        self.scale = scale
+
+    def _key(self, suffix):
+        return "{}:{}:{}".format(METRICS_KEY_PREFIX, self.name, suffix)
+
+    def keys(self):
+        return [self._key(bucket) for bucket in self.buckets] + [self._key("sum"), self._key("count")]
+
+    def observe(self, value):
+        bucket = next((bucket for bucket in self.buckets[:-1] if value <= bucket), "+Inf")
+        _incr(self._key(bucket))
+        _incr(self._key("sum"), int(value * self.scale))
+        _incr(self._key("count"))
+
+    def samples(self, data):
+        cumulative = 0
+        for bucket in self.buckets:
+            cumulative += data.get(self._key(bucket)) or 0
+            yield '{}_bucket{{le="{}"}} {}'.format(self.name, bucket, cumulative)
+        yield "{}_sum {}".format(self.name, (data.get(self._key("sum")) or 0) / self.scale)
+        yield "{}_count {}".format(self.name, data.get(self._key("count")) or 0)
+
+
+LOOKUPS = Counter(
+    "djangocms_page_meta_lookups_total",
+    "Page meta lookups by cache result.",
+    label="result",
+    values=("hit", "miss"),
+)
+BUILD_SECONDS = Histogram(
+    "djangocms_page_meta_build_seconds",
+    "Time spent building the page meta on cache misses.",
+    LATENCY_BUCKETS,
+)
+INVALIDATIONS = Counter(
+    "djangocms_page_meta_invalidations_total",
+    "Page meta cache invalidations by receiver.",
+    label="receiver",
+    values=(
+        "cleanup_page",
+        "cleanup_page_tree",
+        "cleanup_title",
+        "cleanup_pagemeta",
+        "cleanup_titlemeta",
+        "cleanup_metaattribute",
+        "cleanup_image",
+        "cleanup_defaultmetaimage",
+        "cleanup_tags",
+        "cleanup_version",
+    ),
+)
+INVALIDATION_BATCH_SIZE = Histogram(
+    "djangocms_page_meta_invalidation_batch_size",
+    "Number of cache keys deleted by each invalidation.",
+    SIZE_BUCKETS,
+    scale=1,
+)
+TOOLBAR_POPULATE_SECONDS = Histogram(
+    "djangocms_page_meta_toolbar_populate_seconds",
+    "Time spent populating the page meta toolbar menu.",
+    LATENCY_BUCKETS,
+)
+
+METRICS = (LOOKUPS, BUILD_SECONDS, INVALIDATIONS, INVALIDATION_BATCH_SIZE, TOOLBAR_POPULATE_SECONDS)
+
+
+def _record_lookup(sender, hit, timings, **kwargs):
+    LOOKUPS.inc(value="hit" if hit else "miss")
+    if not hit:
+        BUILD_SECONDS.observe(sum(elapsed for phase, elapsed in timings.items() if phase != "cache"))
+
+
+def _record_invalidation(sender, source, keys, **kwargs):
+    if source in INVALIDATIONS.values:
+        INVALIDATIONS.inc(value=source)
+    INVALIDATION_BATCH_SIZE.observe(len(keys))
+
+
+def _record_toolbar(sender, duration, **kwargs):
+    TOOLBAR_POPULATE_SECONDS.observe(duration)
+
+
+def connect():
+    """
+    Start collecting metrics.
+
+    Called on startup when :ref:`PAGE_META_METRICS` is enabled.
+    """
+    page_meta_resolved.connect(_record_lookup, dispatch_uid="djangocms_page_meta_metrics")
+    page_meta_invalidated.connect(_record_invalidation, dispatch_uid="djangocms_page_meta_metrics")
+    toolbar_populated.connect(_record_toolbar, dispatch_uid="djangocms_page_meta_metrics")
+
+
+def disconnect():
+    """
+    Stop collecting metrics.
+    """
+    page_meta_resolved.disconnect(dispatch_uid="djangocms_page_meta_metrics")
+    page_meta_invalidated.disconnect(dispatch_uid="djangocms_page_meta_metrics")
+    toolbar_populated.disconnect(dispatch_uid="djangocms_page_meta_metrics")
+
+
+def reset():
+    """
+    Delete all the collected samples.
+    """
+    get_cache().delete_many([key for metric in METRICS for key in metric.keys()])
+
+
+def get_metrics_text():
+    """
+    Render the collected metrics in the Prometheus text exposition format.
+
+    :return: exposition text
+    :type: str
+    """
+    data = get_cache().get_many([key for metric in METRICS for key in metric.keys()])
+    lines = []
+    for metric in METRICS:
+        lines.append("# HELP {} {}".format(metric.name, metric.documentation))
+        lines.append("# TYPE {} {}".format(metric.name, metric.kind))
+        lines.extend(metric.samples(data))
+    return "\n".join(lines) + "\n"
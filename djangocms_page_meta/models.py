@@ -1,8 +1,13 @@
 import ast
+import threading
+import weakref
 
 from cms.extensions import PageExtension
 from cms.extensions.extension_pool import extension_pool
 from cms.models import Page
+from cms.operations import CHANGE_PAGE_TRANSLATION, MOVE_PAGE
+from cms.signals import post_obj_operation
+from cms.utils.i18n import get_language_list
 
 try:
     from cms.extensions import TitleExtension
@@ -13,16 +18,28 @@ try:
     from cms.models import Title
 except ImportError:
     from cms.models import PageContent as Title
+
+from django.apps import apps
 from django.conf import settings
-from django.core.cache import cache
-from django.db import models
-from django.db.models.signals import post_save, pre_delete
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from filer.fields.file import FilerFileField
+from filer.models import File
 from meta import settings as meta_settings
 
-from .utils import get_cache_key, get_metatags
+from .compat import get_page_tags_models, is_draft_content
+from .refresh import dispatch_refresh, refresh_default_image, refresh_page, refresh_pages
+from .signals import page_meta_invalidated
+from .utils import (
+    get_cache,
+    get_cache_key,
+    get_default_image_cache_key,
+    get_index_cache_key,
+    get_metatags,
+    get_page_cache_key,
+)
 
 try:
     from aldryn_snake.template_api import registry
@@ -208,33 +225,339 @@ class DefaultMetaImage(models.Model):
         return self.image.label if self.image else str(self.pk)
 
 
+class _InvalidationBatch:
+    """
+    Cache keys to delete and entries to refresh, collected during a transaction and processed on commit.
+    """
+
+    def __init__(self, using=None, savepoint_ids=frozenset()):
+        self.using = using
+        #: savepoints open when the batch was registered: its callback is discarded if any is rolled back
+        self.savepoint_ids = savepoint_ids
+        self.sources = {}
+        self.refreshes = {}
+        #: page deletions already handled in bulk, by id of the deletion origin
+        self.origins = {}
+
+    def add(self, source, keys, refresh):
+        self.sources.setdefault(source, {}).update(dict.fromkeys(keys))
+        if refresh:
+            self.refreshes[refresh] = None
+
+    def __call__(self):
+        batches = getattr(_pending, "batches", {})
+        if self.using in batches and batches[self.using]() is self:
+            del batches[self.using]
+        keys = {key: None for source_keys in self.sources.values() for key in source_keys}
+        get_cache().delete_many(list(keys))
+        for source, source_keys in self.sources.items():
+            page_meta_invalidated.send(sender=PageMeta, source=source, keys=list(source_keys))
+        for func, *args in self.refreshes:
+            dispatch_refresh(func, *args)
+
+
+#: Weak references to the batch of the current transaction, by database alias
+_pending = threading.local()
+
+
+def _get_batch(using=None):
+    """
+    Return the invalidation batch of the current transaction on the ``using`` database, registering it to be
+    processed on commit.
+
+    Outside transactions a new batch is returned, to be processed immediately.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return _InvalidationBatch()
+    if not hasattr(_pending, "batches"):
+        _pending.batches = {}
+    savepoint_ids = frozenset(sid for sid in connection.savepoint_ids if sid)
+    batch_ref = _pending.batches.get(connection.alias)
+    batch = batch_ref() if batch_ref else None
+    # the on_commit callback is the only strong reference to the batch, dropped by Django when the transaction
+    # is rolled back; a batch registered in a savepoint which is no longer open may have been rolled back too
+    if batch is None or not batch.savepoint_ids <= savepoint_ids:
+        batch = _InvalidationBatch(connection.alias, savepoint_ids)
+        _pending.batches[connection.alias] = weakref.ref(batch)
+        transaction.on_commit(batch, using=connection.alias)
+    return batch
+
+
+def _delete_cache_keys(source, keys, refresh=None, using=None):
+    """
+    Delete the cache keys once the current transaction is committed (immediately outside transactions).
+
+    Keys and refreshes are deduplicated within the transaction and deleted with a single cache request.
+
+    :param source: name of the receiver
+    :param keys: cache keys to delete
+    :param refresh: tuple of refresh function and its arguments to run after deleting the keys
+    :param using: alias of the database the change is written to (the default database if not given)
+    """
+    batch = _get_batch(using)
+    batch.add(source, keys, refresh)
+    if not transaction.get_connection(using).in_atomic_block:
+        batch()
+
+
+def _cleanup_deleted_pages(origin, using=None):
+    """
+    Invalidate at once the entries of all the pages deleted by ``origin`` (the instance or queryset whose deletion
+    sends the ``pre_delete`` signals).
+
+    Pages are fetched with a single query on the first signal of the deletion; the following signals, sent for each
+    deleted page, page content and extension, are ignored.
+
+    :return: whether the signal is part of a page deletion
+    """
+    if isinstance(origin, Page):
+        pages = Page.objects.filter(site_id=origin.site_id, path__startswith=origin.path)
+    elif isinstance(origin, models.QuerySet) and issubclass(origin.model, Page):
+        pages = origin
+    else:
+        return False
+    batch = _get_batch(using)
+    if id(origin) not in batch.origins:
+        # keep a reference to the origin, so that its id is not reused while the batch is pending
+        batch.origins[id(origin)] = origin
+        keys = []
+        languages = {}
+        for page in pages.only("pk", "site_id"):
+            if page.site_id not in languages:
+                languages[page.site_id] = get_language_list(page.site_id)
+                keys.append(get_index_cache_key(page.site_id))
+            keys.append(get_page_cache_key(page))
+            keys.extend(get_cache_key(page, language) for language in languages[page.site_id])
+        _delete_cache_keys("cleanup_page", keys, using=using)
+    return True
+
+
 # Cache cleanup when deleting pages / editing page extensions
 @receiver(pre_delete, sender=Page)
 def cleanup_page(sender, instance, **kwargs):
-    for language in instance.get_languages():
-        key = get_cache_key(instance, language)
-        cache.delete(key)
+    if _cleanup_deleted_pages(kwargs.get("origin"), kwargs.get("using")):
+        return
+    # all the site languages, as languages without a translation may be cached as aliases
+    keys = [get_page_cache_key(instance)]
+    keys.extend(get_cache_key(instance, language) for language in get_language_list(instance.site_id))
+    _delete_cache_keys("cleanup_page", keys, using=kwargs.get("using"))
+
+
+def invalidate_page_tree(page):
+    """
+    Invalidate the language-dependent entries of the page and its descendants, whose URLs depend on the page path.
+
+    Called when pages are moved or their translations are changed from the admin; call it after changing the
+    page tree or the URLs programmatically.
+    """
+    languages = tuple(get_language_list(page.site_id))
+    pages = list(Page.objects.filter(site_id=page.site_id, path__startswith=page.path).only("pk", "site_id"))
+    keys = [get_cache_key(tree_page, language) for tree_page in pages for language in languages]
+    refresh = (refresh_pages, tuple(tree_page.pk for tree_page in pages), languages)
+    _delete_cache_keys("cleanup_page_tree", keys, refresh)
+
 
+@receiver(post_obj_operation)
+def cleanup_page_tree(sender, operation, obj=None, **kwargs):
+    # URLs are updated with bulk queries, which do not send model signals
+    if operation in (MOVE_PAGE, CHANGE_PAGE_TRANSLATION) and isinstance(obj, Page):
+        invalidate_page_tree(obj)
 
+
+@receiver(post_save, sender=Title)
 @receiver(pre_delete, sender=Title)
 def cleanup_title(sender, instance, **kwargs):
+    if _cleanup_deleted_pages(kwargs.get("origin"), kwargs.get("using")):
+        return
+    if is_draft_content(instance):
+        # drafts are never cached: the public entry is refreshed on publish, see cleanup_version
+        return
     key = get_cache_key(instance.page, instance.language)
-    cache.delete(key)
+    _delete_cache_keys(
+        "cleanup_title", [key], (refresh_page, instance.page_id, (instance.language,)), kwargs.get("using")
+    )
 
 
 @receiver(post_save, sender=PageMeta)
 @receiver(pre_delete, sender=PageMeta)
 def cleanup_pagemeta(sender, instance, **kwargs):
-    for language in instance.extended_object.get_languages():
-        key = get_cache_key(instance.extended_object, language)
-        cache.delete(key)
+    if _cleanup_deleted_pages(kwargs.get("origin"), kwargs.get("using")):
+        return
+    keys = [get_page_cache_key(instance.extended_object)]
+    # the extension index only changes when the extension is created or deleted
+    if kwargs.get("created", True):
+        keys.append(get_index_cache_key(instance.extended_object.site_id))
+    refresh = (refresh_page, instance.extended_object_id, ())
+    _delete_cache_keys("cleanup_pagemeta", keys, refresh, kwargs.get("using"))
 
 
 @receiver(post_save, sender=TitleMeta)
 @receiver(pre_delete, sender=TitleMeta)
 def cleanup_titlemeta(sender, instance, **kwargs):
-    key = get_cache_key(instance.extended_object.page, instance.extended_object.language)
-    cache.delete(key)
+    if _cleanup_deleted_pages(kwargs.get("origin"), kwargs.get("using")):
+        return
+    if is_draft_content(instance.extended_object):
+        return
+    keys = [get_cache_key(instance.extended_object.page, instance.extended_object.language)]
+    if kwargs.get("created", True):
+        keys.append(get_index_cache_key(instance.extended_object.page.site_id))
+    title = instance.extended_object
+    refresh = (refresh_page, title.page_id, (title.language,))
+    _delete_cache_keys("cleanup_titlemeta", keys, refresh, kwargs.get("using"))
+
+
+@receiver(post_save, sender=GenericMetaAttribute)
+@receiver(pre_delete, sender=GenericMetaAttribute)
+def cleanup_metaattribute(sender, instance, **kwargs):
+    if _cleanup_deleted_pages(kwargs.get("origin"), kwargs.get("using")):
+        return
+    if instance.page_id:
+        page = instance.page.extended_object
+        languages = ()
+        keys = [get_page_cache_key(page)]
+    elif instance.title_id:
+        if is_draft_content(instance.title.extended_object):
+            return
+        page = instance.title.extended_object.page
+        languages = (instance.title.extended_object.language,)
+        keys = [get_cache_key(page, languages[0])]
+    else:
+        return
+    if kwargs.get("created", True):
+        keys.append(get_index_cache_key(page.site_id))
+    _delete_cache_keys("cleanup_metaattribute", keys, (refresh_page, page.pk, languages), kwargs.get("using"))
+
+
+@receiver(post_save, sender=DefaultMetaImage)
+@receiver(pre_delete, sender=DefaultMetaImage)
+def cleanup_defaultmetaimage(sender, instance, **kwargs):
+    keys = [get_default_image_cache_key()]
+    _delete_cache_keys("cleanup_defaultmetaimage", keys, (refresh_default_image,), kwargs.get("using"))
+
+
+def cleanup_image(sender, instance, **kwargs):
+    if kwargs.get("created"):
+        return
+    using = kwargs.get("using")
+    for page_meta in instance.djangocms_page_meta_page.select_related("extended_object"):
+        keys = [get_page_cache_key(page_meta.extended_object)]
+        _delete_cache_keys("cleanup_image", keys, (refresh_page, page_meta.extended_object_id, ()), using)
+    for title_meta in instance.djangocms_page_meta_title.select_related("extended_object__page"):
+        title = title_meta.extended_object
+        keys = [get_cache_key(title.page, title.language)]
+        _delete_cache_keys("cleanup_image", keys, (refresh_page, title.page_id, (title.language,)), using)
+    if instance.djangocms_page_meta_default_image.exists():
+        keys = [get_default_image_cache_key()]
+        _delete_cache_keys("cleanup_image", keys, (refresh_default_image,), using)
+
+
+def connect_images():
+    """
+    Invalidate the cached entries when the filer files used as meta images are changed or deleted.
+
+    The extensions using a deleted file are deleted along with it and invalidate their own entries; the default
+    meta image is set to null instead, which sends no signals, so its entry is invalidated before the deletion.
+    Files send signals with their own class as sender, so the receivers are connected for each ``File`` subclass
+    (e.g. filer ``Image``).
+
+    Called on startup.
+    """
+    for model in apps.get_models():
+        if issubclass(model, File):
+            post_save.connect(cleanup_image, sender=model, dispatch_uid="djangocms_page_meta_image")
+            pre_delete.connect(cleanup_image, sender=model, dispatch_uid="djangocms_page_meta_image")
+
+
+def cleanup_version(sender, operation, obj, **kwargs):
+    # djangocms-versioning publishes and unpublishes page contents without saving them
+    from djangocms_versioning.constants import OPERATION_PUBLISH, OPERATION_UNPUBLISH
+
+    if operation not in (OPERATION_PUBLISH, OPERATION_UNPUBLISH) or not isinstance(obj.content, Title):
+        return
+    content = obj.content
+    # draft extensions are not tracked in the index, which may be stale for the published content
+    keys = [get_cache_key(content.page, content.language), get_index_cache_key(content.page.site_id)]
+    _delete_cache_keys("cleanup_version", keys, (refresh_page, content.page_id, (content.language,)))
+
+
+def connect_versioning():
+    """
+    Invalidate the cached entries when page contents are published or unpublished with djangocms-versioning.
+
+    Called on startup, if djangocms-versioning is installed.
+    """
+    if not apps.is_installed("djangocms_versioning"):
+        return
+    from djangocms_versioning.signals import post_version_operation
+
+    post_version_operation.connect(cleanup_version, dispatch_uid="djangocms_page_meta_version")
+
+
+def _invalidate_tags(page_tags=(), title_tags=(), using=None):
+    for extension in page_tags:
+        keys = [get_page_cache_key(extension.extended_object)]
+        _delete_cache_keys("cleanup_tags", keys, (refresh_page, extension.extended_object_id, ()), using)
+    for extension in title_tags:
+        title = extension.extended_object
+        keys = [get_cache_key(title.page, title.language)]
+        _delete_cache_keys("cleanup_tags", keys, (refresh_page, title.page_id, (title.language,)), using)
+
+
+def cleanup_tags(sender, instance, action=None, reverse=False, model=None, pk_set=None, **kwargs):
+    # m2m_changed (tags added / removed) or pre_delete of the djangocms-page-tags extensions
+    if reverse:
+        # changed from the tag side (e.g. tag.pagetags_set.add(extension)): instance is the tag, pk_set holds the
+        # extension ids; cleared extensions can only be found before clearing
+        if action not in ("post_add", "post_remove", "pre_clear"):
+            return
+    elif action is not None and not action.startswith("post_"):
+        return
+    if _cleanup_deleted_pages(kwargs.get("origin"), kwargs.get("using")):
+        return
+    PageTags, TitleTags = get_page_tags_models()
+    using = kwargs.get("using")
+    if reverse:
+        extensions = model.objects.filter(tags=instance) if pk_set is None else model.objects.filter(pk__in=pk_set)
+        if model is PageTags:
+            _invalidate_tags(page_tags=extensions.select_related("extended_object"), using=using)
+        else:
+            _invalidate_tags(title_tags=extensions.select_related("extended_object__page"), using=using)
+    elif isinstance(instance, PageTags):
+        _invalidate_tags(page_tags=[instance], using=using)
+    elif isinstance(instance, TitleTags):
+        _invalidate_tags(title_tags=[instance], using=using)
+
+
+def cleanup_tag(sender, instance, **kwargs):
+    # tag renamed or deleted: all the pages using it are affected
+    if kwargs.get("created"):
+        return
+    PageTags, TitleTags = get_page_tags_models()
+    _invalidate_tags(
+        PageTags.objects.filter(tags=instance).select_related("extended_object"),
+        TitleTags.objects.filter(tags=instance).select_related("extended_object__page"),
+        kwargs.get("using"),
+    )
+
+
+def connect_tags():
+    """
+    Invalidate the cached entries when djangocms-page-tags tags are assigned, removed, renamed or deleted.
+
+    Called on startup, if djangocms-page-tags is installed.
+    """
+    tags_models = get_page_tags_models()
+    if tags_models is None:
+        return
+    for model in tags_models:
+        tags_field = model._meta.get_field("tags")
+        pre_delete.connect(cleanup_tags, sender=model, dispatch_uid="djangocms_page_meta_tags")
+        m2m_changed.connect(
+            cleanup_tags, sender=tags_field.remote_field.through, dispatch_uid="djangocms_page_meta_tags"
+        )
+        post_save.connect(cleanup_tag, sender=tags_field.remote_field.model, dispatch_uid="djangocms_page_meta_tag")
+        pre_delete.connect(cleanup_tag, sender=tags_field.remote_field.model, dispatch_uid="djangocms_page_meta_tag")
 
 
 if registry:
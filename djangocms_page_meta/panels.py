@@ -0,0 +1,109 @@
+import pickle
+import threading
+
+from debug_toolbar.panels import Panel
+from django.utils.translation import gettext_lazy as _, ngettext
+
+from .signals import add_query_consumer, page_meta_resolved, remove_query_consumer, toolbar_populated
+from .utils import compress_entry
+
+#: Meta attributes shown in the panel for each lookup
+PANEL_FIELDS = (
+    "title",
+    "description",
+    "keywords",
+    "url",
+    "image",
+    "locale",
+    "og_type",
+    "og_description",
+    "twitter_type",
+    "twitter_description",
+    "schemaorg_type",
+    "schemaorg_name",
+    "schemaorg_description",
+    "robots",
+    "tag",
+    "extra_custom_props",
+)
+
+
+def _serialize_queries(queries):
+    return [{"sql": query["sql"], "params": repr(query["params"]), "time": query["time"] * 1000} for query in queries]
+
+
+class PageMetaPanel(Panel):
+    """
+    django-debug-toolbar panel showing the cost of the page meta lookups in the current request.
+
+    Enable it by adding ``djangocms_page_meta.panels.PageMetaPanel`` to ``DEBUG_TOOLBAR_PANELS``.
+    """
+
+    title = _("Page meta")
+    template = "djangocms_page_meta/debug_toolbar/panel.html"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookups = []
+        self.toolbars = []
+        self._thread = None
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        lookups = stats.get("lookups", [])
+        misses = len([lookup for lookup in lookups if not lookup["hit"]])
+        return ngettext(
+            "%(count)d lookup, %(misses)d misses", "%(count)d lookups, %(misses)d misses", len(lookups)
+        ) % {
+            "count": len(lookups),
+            "misses": misses,
+        }
+
+    def enable_instrumentation(self):
+        # the signals are process-wide: only the lookups of the thread serving the request are recorded
+        self._thread = threading.get_ident()
+        add_query_consumer(self)
+        page_meta_resolved.connect(self._record_lookup)
+        toolbar_populated.connect(self._record_toolbar)
+
+    def disable_instrumentation(self):
+        page_meta_resolved.disconnect(self._record_lookup)
+        toolbar_populated.disconnect(self._record_toolbar)
+        remove_query_consumer(self)
+
+    def _record_lookup(self, sender, page, language, keys, hit, meta, entries, timings, queries, **kwargs):
+        if threading.get_ident() != self._thread:
+            return
+        self.lookups.append(
+            {
+                "page": str(page.pk),
+                "language": language,
+                "keys": keys,
+                "hit": hit,
+                "timings": {phase: elapsed * 1000 for phase, elapsed in timings.items()},
+                "total_time": sum(timings.values()) * 1000,
+                "queries": _serialize_queries(queries),
+                "fields": {field: repr(getattr(meta, field, None)) for field in PANEL_FIELDS},
+                "size": sum(
+                    len(pickle.dumps(compress_entry(dict(entry)), pickle.HIGHEST_PROTOCOL))
+                    for entry in entries.values()
+                ),
+            }
+        )
+
+    def _record_toolbar(self, sender, request, duration, queries, **kwargs):
+        if threading.get_ident() != self._thread:
+            return
+        self.toolbars.append({"time": duration * 1000, "queries": _serialize_queries(queries)})
+
+    def generate_stats(self, request, response):
+        self.record_stats(
+            {
+                "lookups": self.lookups,
+                "toolbars": self.toolbars,
+                "hits": len([lookup for lookup in self.lookups if lookup["hit"]]),
+                "misses": len([lookup for lookup in self.lookups if not lookup["hit"]]),
+                "total_time": sum(lookup["total_time"] for lookup in self.lookups),
+            }
+        )
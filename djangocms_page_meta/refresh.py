@@ -0,0 +1,88 @@
+"""
+Write-through refresh of the cache entries.
+
+When :ref:`PAGE_META_WRITE_THROUGH` is enabled, the cache cleanup receivers schedule the rebuild of the affected
+entries once the current transaction is committed, either in the same thread (``"sync"``) or in a background
+thread of the current process (``"background"``).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    """
+    Return the executor running the background refreshes, created on first use.
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="djangocms_page_meta")
+    return _executor
+
+
+def _run(func, args, background):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Error refreshing page meta cache entries")
+    finally:
+        if background:
+            # connections are per thread: do not leave them open in the executor thread
+            connections.close_all()
+
+
+def dispatch_refresh(func, *args):
+    """
+    Call ``func(*args)`` according to :ref:`PAGE_META_WRITE_THROUGH`.
+
+    Called by the cache cleanup receivers once the transaction is committed; does nothing if write-through is
+    disabled.
+    """
+    mode = get_setting("WRITE_THROUGH")
+    if mode == "background":
+        get_executor().submit(_run, func, args, True)
+    elif mode == "sync":
+        _run(func, args, False)
+
+
+def refresh_page(page_id, languages=()):
+    """
+    Rebuild the cache entries of the page in the given languages, if the page still exists.
+    """
+    from cms.models import Page
+
+    from .utils import refresh_page_meta
+
+    page = Page.objects.filter(pk=page_id).first()
+    if page is not None:
+        refresh_page_meta(page, languages)
+
+
+def refresh_pages(page_ids, languages=()):
+    """
+    Rebuild the cache entries of the pages in the given languages, skipping the pages no longer existing.
+    """
+    from cms.models import Page
+
+    from .utils import refresh_page_meta
+
+    for page in Page.objects.filter(pk__in=page_ids):
+        refresh_page_meta(page, languages)
+
+
+def refresh_default_image():
+    """
+    Store the default meta image URL in the cache.
+    """
+    from .utils import _get_default_image
+
+    _get_default_image({})
@@ -3,6 +3,7 @@ from django.utils.translation import gettext_lazy as _
 
 def get_setting(name):
     from django.conf import settings
+    from django.core.cache.backends.base import DEFAULT_TIMEOUT
 
     description_length = getattr(settings, "PAGE_META_DESCRIPTION_LENGTH", None) or 320
 
@@ -19,9 +20,42 @@ def get_setting(name):
         ("nositelinkssearchbox", _("No Site Links Search Box")),
     )
 
+    metrics = getattr(settings, "PAGE_META_METRICS", False)
+
+    slow_build_threshold = getattr(settings, "PAGE_META_SLOW_BUILD_THRESHOLD", None)
+
+    snapshot = getattr(settings, "PAGE_META_SNAPSHOT", False)
+
+    snapshot_check_interval = getattr(settings, "PAGE_META_SNAPSHOT_CHECK_INTERVAL", 5)
+
+    artifact = getattr(settings, "PAGE_META_ARTIFACT", None)
+
+    cache = getattr(settings, "PAGE_META_CACHE", "default")
+
+    compression = getattr(settings, "PAGE_META_COMPRESSION", None)
+
+    compression_threshold = getattr(settings, "PAGE_META_COMPRESSION_THRESHOLD", 1024)
+
+    write_through = getattr(settings, "PAGE_META_WRITE_THROUGH", None)
+
+    cache_timeout = getattr(settings, "PAGE_META_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+    menu_fields = getattr(settings, "PAGE_META_MENU_FIELDS", ())
+
     default = {
         "PAGE_META_DESCRIPTION_LENGTH": description_length,
         "PAGE_META_TWITTER_DESCRIPTION_LENGTH": tw_description_length,
         "PAGE_META_ROBOTS_CHOICES": robots_choices,
+        "PAGE_META_METRICS": metrics,
+        "PAGE_META_SLOW_BUILD_THRESHOLD": slow_build_threshold,
+        "PAGE_META_SNAPSHOT": snapshot,
+        "PAGE_META_SNAPSHOT_CHECK_INTERVAL": snapshot_check_interval,
+        "PAGE_META_ARTIFACT": artifact,
+        "PAGE_META_CACHE": cache,
+        "PAGE_META_CACHE_TIMEOUT": cache_timeout,
+        "PAGE_META_COMPRESSION": compression,
+        "PAGE_META_COMPRESSION_THRESHOLD": compression_threshold,
+        "PAGE_META_WRITE_THROUGH": write_through,
+        "PAGE_META_MENU_FIELDS": menu_fields,
     }
     return default["PAGE_META_%s" % name]
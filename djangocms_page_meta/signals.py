@@ -0,0 +1,50 @@
+import threading
+
+from django.dispatch import Signal
+
+#: Sent by :py:func:`djangocms_page_meta.utils.get_page_meta` after each lookup.
+#:
+#: Keyword arguments: ``page``, ``language``, ``keys`` (cache keys), ``hit`` (whether all the entries were found in
+#: cache), ``meta`` (the resolved ``Meta`` instance), ``entries`` (the cached page-specific attributes by cache key),
+#: ``timings`` (seconds spent in each phase) and ``queries`` (SQL issued during the lookup, only recorded while a
+#: query consumer is registered with :py:func:`add_query_consumer`).
+page_meta_resolved = Signal()
+
+#: Sent by :py:class:`djangocms_page_meta.cms_toolbars.PageToolbarMeta` after the toolbar is populated.
+#:
+#: Keyword arguments: ``request``, ``duration`` (seconds) and ``queries`` (SQL issued while populating, only recorded
+#: while a query consumer is registered with :py:func:`add_query_consumer`).
+toolbar_populated = Signal()
+
+#: Sent by the cache cleanup receivers after deleting the page meta cache entries.
+#:
+#: Keyword arguments: ``source`` (name of the receiver, e.g. ``cleanup_page``) and ``keys`` (deleted cache keys).
+page_meta_invalidated = Signal()
+
+#: Registered consumers of the ``queries`` argument of the signals, with the id of the thread they registered in
+_query_consumers = {}
+
+
+def add_query_consumer(consumer):
+    """
+    Record the SQL queries sent with ``page_meta_resolved`` and ``toolbar_populated`` in the current thread until
+    ``consumer`` is removed.
+
+    Capturing the queries wraps every database call, so receivers only interested in hits and timings (e.g. the
+    metrics) should not register.
+    """
+    _query_consumers[consumer] = threading.get_ident()
+
+
+def remove_query_consumer(consumer):
+    """
+    Stop recording the SQL queries for ``consumer``.
+    """
+    _query_consumers.pop(consumer, None)
+
+
+def has_query_consumers():
+    """
+    Return whether any consumer of the SQL queries is registered in the current thread.
+    """
+    return threading.get_ident() in _query_consumers.values()
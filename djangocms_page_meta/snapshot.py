@@ -0,0 +1,206 @@
+"""
+In-process snapshot of the page meta of all the pages.
+
+Enabled by :ref:`PAGE_META_SNAPSHOT`: the page-specific attributes of every page and language are loaded in a
+read-only snapshot, so that :py:func:`djangocms_page_meta.utils.get_page_meta` does not hit the cache.
+Invalidations bump a version counter shared in the cache; each process checks it every
+:ref:`PAGE_META_SNAPSHOT_CHECK_INTERVAL` seconds and rebuilds its snapshot in a background thread when it
+changes.
+"""
+
+import threading
+from time import monotonic
+
+from django.db import connections
+
+from .refresh import _run, get_executor
+from .settings import get_setting
+from .signals import page_meta_invalidated
+from .utils import get_cache
+
+_snapshot = None
+_checked_at = float("-inf")
+_rebuilding = False
+_lock = threading.Lock()
+
+
+class Snapshot:
+    """
+    Page-specific meta attributes of all the pages, as built by :py:func:`build_snapshot`.
+    """
+
+    __slots__ = ("version", "pages", "titles", "default_image")
+
+    def __init__(self, version, pages, titles, default_image):
+        #: value of the shared version counter when the snapshot was built
+        self.version = version
+        #: language-independent attributes by page id
+        self.pages = pages
+        #: language-dependent attributes by page id and language
+        self.titles = titles
+        #: URL of the default meta image (empty string if not set)
+        self.default_image = default_image
+
+    def __len__(self):
+        return len(self.titles)
+
+    def get(self, page_id, language):
+        """
+        Return the language-independent and language-dependent attributes of the page.
+
+        :return: tuple of attributes or ``None`` if the page is not in the snapshot
+        """
+        page_overlay = self.pages.get(page_id)
+        title_overlay = self.titles.get((page_id, language))
+        if page_overlay is None or title_overlay is None:
+            return None
+        return page_overlay, title_overlay
+
+
+def get_version_cache_key():
+    """
+    Create the cache key for the snapshot version counter
+    """
+    from cms.utils.conf import get_cms_setting
+
+    return "{}page_meta_snapshot_version".format(get_cms_setting("CACHE_PREFIX"))
+
+
+def get_version():
+    return get_cache().get(get_version_cache_key(), 0)
+
+
+def bump_version():
+    """
+    Increment the shared version counter, to make all the processes reload their snapshot.
+    """
+    cache = get_cache()
+    key = get_version_cache_key()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def build_snapshot(version=None):
+    """
+    Build the meta attributes of all the pages in all the languages of their site.
+
+    :param version: version to assign to the snapshot, current version if not provided
+    :return: Snapshot instance
+    """
+    from .utils import _get_default_image, iter_page_overlays
+
+    if version is None:
+        version = get_version()
+    pages = {}
+    titles = {}
+    for page, __, page_overlay, title_overlays in iter_page_overlays():
+        pages[page.pk] = page_overlay
+        for language, title_overlay in title_overlays.items():
+            titles[(page.pk, language)] = title_overlay
+    return Snapshot(version, pages, titles, _get_default_image({}))
+
+
+def _rebuild(version):
+    global _snapshot, _rebuilding
+
+    snapshot = None
+    try:
+        snapshot = build_snapshot(version)
+    finally:
+        with _lock:
+            if snapshot is not None:
+                _snapshot = snapshot
+            _rebuilding = False
+
+
+def get_snapshot():
+    """
+    Return the current snapshot, replacing it if the shared version changed since it has been built.
+
+    The version is checked at most once every :ref:`PAGE_META_SNAPSHOT_CHECK_INTERVAL` seconds; when it changed,
+    the snapshot is rebuilt in a background thread, and the previous one is used until it is ready. Only the
+    first snapshot of the process is built in the calling thread.
+
+    :return: Snapshot instance
+    """
+    global _snapshot, _checked_at, _rebuilding
+
+    snapshot = _snapshot
+    now = monotonic()
+    if snapshot is not None and now - _checked_at < get_setting("SNAPSHOT_CHECK_INTERVAL"):
+        return snapshot
+    if snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                _snapshot = build_snapshot()
+                _checked_at = now
+            return _snapshot
+    if not _lock.acquire(blocking=False):
+        return snapshot
+    try:
+        _checked_at = now
+        version = get_version()
+        if _rebuilding or snapshot.version == version:
+            return snapshot
+        _rebuilding = True
+    finally:
+        _lock.release()
+    get_executor().submit(_run, _rebuild, (version,), True)
+    return _snapshot
+
+
+def preload_snapshot():
+    """
+    Build the snapshot in the current process.
+
+    Meant to be called before forking the worker processes (e.g.: in the WSGI module with gunicorn ``--preload``),
+    possibly followed by ``gc.freeze()``, so that the snapshot is shared copy-on-write among the workers.
+    Database connections are closed afterwards, as they must not be shared with the forked processes.
+
+    :return: Snapshot instance
+    """
+    global _snapshot, _checked_at
+
+    with _lock:
+        _snapshot = build_snapshot()
+        _checked_at = monotonic()
+    connections.close_all()
+    return _snapshot
+
+
+def clear_snapshot():
+    """
+    Discard the snapshot of the current process.
+    """
+    global _snapshot, _checked_at, _rebuilding
+
+    with _lock:
+        _snapshot = None
+        _checked_at = float("-inf")
+        _rebuilding = False
+
+
+def _bump_version(sender, **kwargs):
+    global _checked_at
+
+    bump_version()
+    # make the current process check the version on the next lookup
+    _checked_at = float("-inf")
+
+
+def connect():
+    """
+    Bump the snapshot version on cache invalidations.
+
+    Called on startup when :ref:`PAGE_META_SNAPSHOT` is enabled.
+    """
+    page_meta_invalidated.connect(_bump_version, dispatch_uid="djangocms_page_meta_snapshot")
+
+
+def disconnect():
+    """
+    Stop tracking cache invalidations.
+    """
+    page_meta_invalidated.disconnect(dispatch_uid="djangocms_page_meta_snapshot")
@@ -1,10 +1,11 @@
-from classytags.arguments import Argument
+from classytags.arguments import Argument, Flag
 from classytags.core import Options, Tag
 from cms.utils import get_language_from_request
 from django import template
+from django.utils.html import conditional_escape
 from meta.views import Meta
 
-from ..utils import get_page_meta
+from ..utils import LazyPageMeta, get_page_meta, get_page_meta_many
 
 register = template.Library()
 
@@ -16,14 +17,61 @@ class MetaFromPage(Tag):
         Argument("page"),
         "as",
         Argument("varname", required=True, resolve=False),
+        Flag("lazy", true_values=["lazy"], default=False),
     )
 
-    def render_tag(self, context, page, varname):
+    def render_tag(self, context, page, varname, lazy=False):
         request = context.get("request")
         if request:
             language = get_language_from_request(request)
-            meta = get_page_meta(page, language)
+            if lazy:
+                meta = LazyPageMeta(page, language, request)
+            else:
+                meta = get_page_meta(page, language, request)
         else:
             meta = Meta()
         context[varname] = meta
         return ""
+
+
+@register.tag(name="page_meta_field")
+class MetaFieldFromPage(Tag):
+    name = "page_meta_field"
+    options = Options(
+        Argument("page"),
+        Argument("field"),
+        "as",
+        Argument("varname", required=False, resolve=False),
+    )
+
+    def render_tag(self, context, page, field, varname):
+        request = context.get("request")
+        value = None
+        if request:
+            value = getattr(LazyPageMeta(page, get_language_from_request(request), request), field, None)
+        if varname:
+            context[varname] = value
+            return ""
+        if value is None:
+            return ""
+        return conditional_escape(value)
+
+
+@register.tag(name="page_meta_list")
+class MetaFromPages(Tag):
+    name = "page_meta_list"
+    options = Options(
+        Argument("pages"),
+        "as",
+        Argument("varname", required=True, resolve=False),
+    )
+
+    def render_tag(self, context, pages, varname):
+        request = context.get("request")
+        pages = list(pages or ())
+        if request:
+            metas = get_page_meta_many(pages, get_language_from_request(request), request)
+        else:
+            metas = [Meta() for __ in pages]
+        context[varname] = list(zip(pages, metas))
+        return ""
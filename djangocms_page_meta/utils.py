@@ -1,169 +1,1184 @@
+import bz2
+import hashlib
+import logging
+import lzma
+import pickle
+import zlib
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from itertools import islice
+from math import ceil
+from time import perf_counter
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.models import CharField, Value
+from django.dispatch import receiver
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.utils.translation import get_language_from_request
 from meta import settings as meta_settings
 
-from .compat import get_page_title_obj
+from .compat import get_page_tags_models, get_page_title_obj, get_publication_dates
+from .settings import get_setting
+from .signals import has_query_consumers, page_meta_resolved
 
+logger = logging.getLogger(__name__)
 
-def get_cache_key(page, language):
+#: Version of the layout of the cached entries: bump it whenever the cached data changes structure
+CACHE_SCHEMA_VERSION = 4
+
+#: Key marking a language-dependent cache entry as an alias of the entry of its fallback language
+ALIAS_KEY = "_alias"
+
+
+#: Modules available for :ref:`PAGE_META_COMPRESSION`
+COMPRESSION_MODULES = {"zlib": zlib, "lzma": lzma, "bz2": bz2}
+
+#: Cache value wrapping a compressed pickled entry
+CompressedEntry = namedtuple("CompressedEntry", ("algorithm", "data"))
+
+
+class QueryRecorder:
     """
-    Create the cache key for the current page and language
+    Database execute wrapper collecting the SQL issued while active.
+
+    Use :py:func:`capture_queries` to install it on all the database connections.
     """
-    from cms.cache import _get_cache_key
 
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({"sql": sql, "params": params, "time": perf_counter() - start})
+
+
+@contextmanager
+def capture_queries(enabled=True):
+    """
+    Collect the queries issued within the block.
+
+    :param enabled: if ``False`` no wrapper is installed and the recorder stays empty
+
+    :return: QueryRecorder instance
+    """
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        if enabled:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def _phase(timings, name):
+    """
+    Accumulate the time spent in the block in ``timings[name]``.
+    """
+    start = perf_counter()
     try:
-        site_id = page.node.site_id
-    except AttributeError:  # CMS_3_4
-        site_id = page.site_id
-    return _get_cache_key("page_meta", page, language, site_id)
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + perf_counter() - start
 
 
-def get_page_meta(page, language):
+def get_cache():
     """
-    Retrieves all the meta information for the page in the given language
+    Return the cache backend used to store page meta, as configured in :ref:`PAGE_META_CACHE`.
+    """
+    from django.core.cache import caches
 
-    :param page: a Page instance
-    :param lang: a language code
+    return caches[get_setting("CACHE")]
 
-    :return: Meta instance
-    :type: object
+
+def compress_entry(value):
     """
-    from django.core.cache import cache
-    from meta.views import Meta
+    Compress the cache entry if :ref:`PAGE_META_COMPRESSION` is enabled and its pickled size is above
+    :ref:`PAGE_META_COMPRESSION_THRESHOLD`.
+
+    :return: CompressedEntry instance or the original value
+    """
+    algorithm = get_setting("COMPRESSION")
+    if not algorithm:
+        return value
+    try:
+        module = COMPRESSION_MODULES[algorithm]
+    except KeyError:
+        raise ImproperlyConfigured(
+            "PAGE_META_COMPRESSION must be one of {}".format(", ".join(sorted(COMPRESSION_MODULES)))
+        )
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    if len(data) < get_setting("COMPRESSION_THRESHOLD"):
+        return value
+    return CompressedEntry(algorithm, module.compress(data))
+
 
-    from .models import DefaultMetaImage, PageMeta, TitleMeta
+def decompress_entry(value):
+    """
+    Restore a cache entry stored by :py:func:`compress_entry`.
+
+    Entries are decompressed with the algorithm they have been compressed with, regardless of the current settings.
+    """
+    if isinstance(value, CompressedEntry):
+        return pickle.loads(COMPRESSION_MODULES[value.algorithm].decompress(value.data))
+    return value
 
+
+def get_cache_timeout(page):
+    """
+    Return the timeout of the cache entries of the page.
+
+    Entries expire at the next publication boundary of the page (publication start or end date in the future,
+    see :py:func:`djangocms_page_meta.compat.get_publication_dates`), or after :ref:`PAGE_META_CACHE_TIMEOUT`
+    seconds if no boundary is nearer.
+
+    :return: timeout in seconds (``None`` to never expire)
+    """
+    timeout = get_setting("CACHE_TIMEOUT")
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = get_cache().default_timeout
+    now = timezone.now()
+    for boundary in get_publication_dates(page):
+        if boundary > now:
+            seconds = ceil((boundary - now).total_seconds())
+            timeout = seconds if timeout is None else min(timeout, seconds)
+    return timeout
+
+
+def _get_site_id(page):
     try:
-        meta_key = get_cache_key(page, language)
-    except AttributeError:
+        return page.node.site_id
+    except AttributeError:  # CMS_3_4
+        return page.site_id
+
+
+@lru_cache(maxsize=None)
+def get_schema_fingerprint():
+    """
+    Return a short hash of :py:data:`CACHE_SCHEMA_VERSION`.
+
+    Upgrading to a version with a different cache layout switches the cache keys to a fresh namespace.
+    """
+    return hashlib.sha1(str(CACHE_SCHEMA_VERSION).encode("utf-8")).hexdigest()[:10]
+
+
+def get_cache_key(page, language):
+    """
+    Create the cache key for the language-dependent meta of the current page and language
+    """
+    from cms.cache import _get_cache_key
+
+    name = "page_meta_{}".format(get_schema_fingerprint())
+    return _get_cache_key(name, page, language, _get_site_id(page))
+
+
+def get_page_cache_key(page):
+    """
+    Create the cache key for the language-independent meta of the current page
+    """
+    from cms.cache import _get_cache_key
+
+    name = "page_meta_page_{}".format(get_schema_fingerprint())
+    return _get_cache_key(name, page, "", _get_site_id(page))
+
+
+def get_tags_many(page_ids):
+    """
+    Fetch the djangocms-page-tags tags of the given pages and of their page contents with a single query.
+
+    :param page_ids: Page ids
+    :return: dictionary of tag names by page id and language (``None`` for the page tags), ``None`` if
+             djangocms-page-tags is not installed
+    """
+    tags_models = get_page_tags_models()
+    if tags_models is None:
         return None
-    meta = cache.get(meta_key)
-    if not meta:
-        meta = Meta()
-        title = get_page_title_obj(page, language)
+    PageTags, TitleTags = tags_models
+    page_tags = PageTags.objects.filter(extended_object__in=page_ids).values_list(
+        "extended_object_id", Value("", output_field=CharField()), "tags__name"
+    )
+    title_tags = TitleTags.objects.filter(extended_object__page__in=page_ids).values_list(
+        "extended_object__page_id", "extended_object__language", "tags__name"
+    )
+    tags = {}
+    for page_id, language, name in page_tags.union(title_tags, all=True):
+        if name is None:
+            # extension without tags
+            continue
+        tags.setdefault(page_id, {}).setdefault(language or None, []).append(name)
+    return tags
+
+
+class _TagsLoader:
+    """
+    Tags of a set of pages, fetched with :py:func:`get_tags_many` on first access.
+    """
+
+    def __init__(self, page_ids):
+        self.page_ids = page_ids
+        self.tags = None
+        self.loaded = False
+
+    def get(self, page_id, language=None):
+        """
+        Return the tag names of the page (or of its content in ``language``), ``None`` if djangocms-page-tags
+        is not installed.
+        """
+        if not self.loaded:
+            self.tags = get_tags_many(self.page_ids)
+            self.loaded = True
+        if self.tags is None:
+            return None
+        return self.tags.get(page_id, {}).get(language, [])
+
+
+def _log_slow_build(page, language, timings, queries, threshold):
+    """
+    Log a warning if building the meta took more than ``threshold`` milliseconds.
+    """
+    elapsed = sum(value for phase, value in timings.items() if phase != "cache") * 1000
+    if elapsed < threshold:
+        return
+    build = {
+        "page": page.pk,
+        "language": language,
+        "site": _get_site_id(page),
+        "elapsed": elapsed,
+        "phases": {phase: value * 1000 for phase, value in timings.items()},
+        "queries": [{"sql": query["sql"], "time": query["time"] * 1000} for query in queries],
+    }
+    logger.warning(
+        "Slow page meta build for page %(page)s (language: %(language)s, site: %(site)s): %(elapsed).1f ms, "
+        "%(count)d queries",
+        dict(build, count=len(queries)),
+        extra={"page_meta_build": build},
+    )
+
+
+def get_index_cache_key(site_id):
+    """
+    Create the cache key for the index of the pages with meta extensions in the given site
+    """
+    from cms.utils.conf import get_cms_setting
+
+    return "{}page_meta_index_{}__site:{}".format(get_cms_setting("CACHE_PREFIX"), get_schema_fingerprint(), site_id)
+
+
+def _build_extension_index(site_id):
+    """
+    Collect the pages and languages with meta extensions and extra attributes in the given site.
+
+    :return: dictionary of frozensets with ``pages`` and ``page_extra`` page ids, ``titles`` and ``title_extra``
+             (page id, language) pairs
+    """
+    from .models import GenericMetaAttribute, PageMeta, TitleMeta
+
+    title_fields = ("extended_object__page_id", "extended_object__language")
+    attribute_title_fields = ("title__extended_object__page_id", "title__extended_object__language")
+    return {
+        "pages": frozenset(
+            PageMeta.objects.filter(extended_object__site_id=site_id).values_list("extended_object_id", flat=True)
+        ),
+        "page_extra": frozenset(
+            GenericMetaAttribute.objects.filter(page__extended_object__site_id=site_id).values_list(
+                "page__extended_object_id", flat=True
+            )
+        ),
+        "titles": frozenset(
+            TitleMeta.objects.filter(extended_object__page__site_id=site_id).values_list(*title_fields)
+        ),
+        "title_extra": frozenset(
+            GenericMetaAttribute.objects.filter(title__extended_object__page__site_id=site_id).values_list(
+                *attribute_title_fields
+            )
+        ),
+    }
+
+
+def _get_extension_index(page, cached, timings):
+    """
+    Return the extension index for the page site, fetching it from the cache (once per ``cached`` entries) or
+    building it if not there.
+
+    Only called when some entry must be built, so lookups hitting the cache never transfer the index.
+    """
+    key = get_index_cache_key(_get_site_id(page))
+    if key not in cached:
+        with _phase(timings, "cache"):
+            cached[key] = decompress_entry(get_cache().get(key))
+    if cached[key] is None:
+        with _phase(timings, "index"):
+            cached[key] = _build_extension_index(_get_site_id(page))
+            get_cache().set(key, compress_entry(cached[key]))
+    return cached[key]
+
+
+def _add_extra_attributes(meta, extension):
+    if meta.extra_custom_props is None:
+        meta.extra_custom_props = []
+    for item in extension.extra.all():
+        attribute = item.attribute
+        if not attribute:
+            attribute = item.DEFAULT_ATTRIBUTE
+        meta.extra_custom_props.append((attribute, item.name, item.value))
+
+
+def _resolve_title_meta(meta, page, language, title, index=None, tags=None):
+    """
+    Set the language-dependent attributes from the TitleMeta extension (if any).
+
+    Database lookups are skipped if the ``index`` says the page has no extension in the language; tags are read
+    from the ``tags`` loader, only passed for articles.
+    """
+    from .models import TitleMeta
+
+    if title.meta_description:
+        meta.description = title.meta_description.strip()
+    has_extension = index is None or (page.pk, language) in index["titles"]
+    try:
+        if not has_extension:
+            raise TitleMeta.DoesNotExist
+        titlemeta = getattr(title, "titlemeta", None)
+        if titlemeta is None:
+            titlemeta = (
+                TitleMeta.objects.filter(extended_object__page=page, extended_object__language=language)
+                .order_by("-pk")
+                .first()
+            )
+        if titlemeta is None:
+            raise TitleMeta.DoesNotExist
+        if titlemeta.description:
+            meta.description = titlemeta.description.strip()
+        if titlemeta.keywords:
+            meta.keywords = titlemeta.keywords.strip().split(",")
+        meta.locale = titlemeta.locale
+        meta.og_description = titlemeta.og_description.strip()
+        if not meta.og_description:
+            meta.og_description = meta.description
+        meta.twitter_description = titlemeta.twitter_description.strip()
+        if not meta.twitter_description:
+            meta.twitter_description = meta.description
+        if titlemeta.image:
+            meta.image = titlemeta.image.canonical_url or titlemeta.image.url
+        meta.schemaorg_description = titlemeta.schemaorg_description.strip()
+        if not meta.schemaorg_description:
+            meta.schemaorg_description = meta.description
+        meta.schemaorg_name = titlemeta.schemaorg_name
+        if not meta.schemaorg_name:
+            meta.schemaorg_name = meta.title
+        if index is None or (page.pk, language) in index["title_extra"]:
+            _add_extra_attributes(meta, titlemeta)
+    except (TitleMeta.DoesNotExist, AttributeError):
+        # Skipping title-level metas
+        if meta.description:
+            meta.og_description = meta.description
+            meta.schemaorg_description = meta.description
+            meta.twitter_description = meta.description
+    if tags is not None:
+        title_tags = tags.get(page.pk, language)
+        if title_tags is not None:
+            meta._tags = title_tags
+
+
+def _resolve_page_meta(meta, page, index=None, tags=None):
+    """
+    Set the language-independent attributes from the PageMeta extension (if any).
+
+    Database lookups are skipped if the ``index`` says the page has no extension; tags are read from the ``tags``
+    loader if provided.
+    """
+    from .models import PageMeta
+
+    publication_date = getattr(page, "publication_date", None)
+    publication_end_date = getattr(page, "publication_end_date", None)
+    changed_date = getattr(page, "changed_date", None)
+    if index is not None and page.pk not in index["pages"]:
+        return
+    try:
+        pagemeta = page.pagemeta
+    except PageMeta.DoesNotExist:
+        return
+    meta.object_type = pagemeta.og_type
+    meta.og_type = pagemeta.og_type
+    meta.og_app_id = pagemeta.og_app_id
+    meta.fb_pages = pagemeta.fb_pages
+    meta.og_profile_id = pagemeta.og_author_fbid
+    meta.twitter_type = pagemeta.twitter_type
+    meta.twitter_site = pagemeta.twitter_site
+    meta.twitter_author = pagemeta.twitter_author
+    meta.schemaorg_type = pagemeta.schemaorg_type
+    meta.robots = pagemeta.robots_list
+    if publication_date:
+        meta.published_time = publication_date.isoformat()
+    if changed_date:
+        meta.modified_time = changed_date.isoformat()
+    if publication_end_date:
+        meta.expiration_time = publication_end_date.isoformat()
+    if meta.og_type == "article":
+        meta.og_publisher = pagemeta.og_publisher
+        meta.og_author_url = pagemeta.og_author_url
+        page_tags = (tags or _TagsLoader([page.pk])).get(page.pk)
+        if page_tags is not None:
+            meta._tags = page_tags
+    if pagemeta.image:
+        meta.image = pagemeta.image.canonical_url or pagemeta.image.url
+    if index is None or page.pk in index["page_extra"]:
+        _add_extra_attributes(meta, pagemeta)
+
+
+def _resolve_page_dates(meta, page):
+    """
+    Set the schema.org dates from the page publication / modification dates.
+    """
+    publication_date = getattr(page, "publication_date", None)
+    changed_date = getattr(page, "changed_date", None)
+    if publication_date:
+        meta.schemaorg_datePublished = publication_date.isoformat()
+    if changed_date:
+        meta.schemaorg_dateModified = changed_date.isoformat()
+
+
+class MetaOverlay(dict):
+    """
+    Page-specific meta attributes, as stored in the cache.
+
+    Attribute access is provided to mimic the ``Meta`` object while building the data; unset attributes
+    evaluate to ``None``.
+    """
+
+    def __getattr__(self, name):
+        return self.get(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+@lru_cache(maxsize=None)
+def get_meta_defaults():
+    """
+    Return the site-wide defaults from django-meta settings, used for the attributes not set by the page.
+    """
+    return {
+        "object_type": meta_settings.get_setting("FB_TYPE"),
+        "og_type": meta_settings.get_setting("FB_TYPE"),
+        "og_app_id": meta_settings.get_setting("FB_APPID"),
+        "fb_pages": meta_settings.get_setting("FB_PAGES"),
+        "og_profile_id": meta_settings.get_setting("FB_PROFILE_ID"),
+        "og_publisher": meta_settings.get_setting("FB_PUBLISHER"),
+        "og_author_url": meta_settings.get_setting("FB_AUTHOR_URL"),
+        "twitter_type": meta_settings.get_setting("TWITTER_TYPE"),
+        "twitter_site": meta_settings.get_setting("TWITTER_SITE"),
+        "twitter_author": meta_settings.get_setting("TWITTER_AUTHOR"),
+        "schemaorg_type": meta_settings.get_setting("SCHEMAORG_TYPE"),
+    }
+
+
+@receiver(setting_changed)
+def _reset_meta_defaults(sender, setting, **kwargs):
+    if setting.startswith("META_"):
+        get_meta_defaults.cache_clear()
+
+
+def get_default_image_cache_key():
+    """
+    Create the cache key for the default meta image URL
+    """
+    from cms.utils.conf import get_cms_setting
+
+    return "{}page_meta_default_image".format(get_cms_setting("CACHE_PREFIX"))
+
+
+def _get_default_image(cached):
+    """
+    Return the URL of the default meta image, from the already fetched ``cached`` entries if available.
+    """
+    from .models import DefaultMetaImage
+
+    key = get_default_image_cache_key()
+    url = cached.get(key)
+    if url is None:
         default_meta_image_obj = DefaultMetaImage.objects.first()
         default_meta_image = default_meta_image_obj.image if default_meta_image_obj else None
-        publication_date = getattr(page, "publication_date", None)
-        publication_end_date = getattr(page, "publication_end_date", None)
-        changed_date = getattr(page, "changed_date", None)
-        meta.extra_custom_props = []
+        url = (default_meta_image.canonical_url or default_meta_image.url) if default_meta_image else ""
+        get_cache().set(key, url)
+    return url
+
+
+def _merge_overlays(page_overlay, title_overlay):
+    """
+    Merge the language-independent and language-dependent attributes.
 
+    Title image and attributes take precedence over the page ones; tags are only used for articles.
+    """
+    overlay = MetaOverlay(page_overlay)
+    page_tags = overlay.pop("_tags", None)
+    page_extra = overlay.pop("extra_custom_props", None) or []
+    for attr, val in title_overlay.items():
+        if attr != "image" or val:
+            overlay[attr] = val
+    title_tags = overlay.pop("_tags", None)
+    overlay.extra_custom_props = (overlay.extra_custom_props or []) + page_extra
+    if overlay.og_type == "article" and page_tags is not None:
+        overlay.tag = ",".join((title_tags or []) + page_tags)
+    return overlay
+
+
+def _compose_meta(overlay, cached):
+    """
+    Create the Meta instance from the page-specific ``overlay`` merging the site-wide defaults.
+
+    :param overlay: page-specific attributes
+    :param cached: cache entries fetched along with the overlay
+    """
+    from meta.views import Meta
+
+    meta = Meta()
+    meta.extra_custom_props = []
+    for attr, val in overlay.items():
+        setattr(meta, attr, val)
+    for attr, val in get_meta_defaults().items():
+        if not getattr(meta, attr, "") and val:
+            setattr(meta, attr, val)
+    if not meta.image:
+        default_image = _get_default_image(cached)
+        if default_image:
+            meta.image = default_image
+    meta.schemaorg_url = meta.url
+    meta.schemaorg_image = meta.image
+    return meta
+
+
+def _build_page_overlay(page, timings, index=None, tags=None):
+    """
+    Build the language-independent meta attributes for the page from the database.
+
+    Time spent in each phase is recorded in ``timings``.
+
+    :return: MetaOverlay instance
+    """
+    meta = MetaOverlay()
+    with _phase(timings, "pagemeta"):
+        _resolve_page_meta(meta, page, index, tags)
+        _resolve_page_dates(meta, page)
+    return meta
+
+
+def _build_title_overlay(page, language, timings, title=None, index=None, tags=None):
+    """
+    Build the language-dependent meta attributes for the page in the given language from the database.
+
+    Time spent in each phase is recorded in ``timings``.
+
+    :return: MetaOverlay instance
+    """
+    meta = MetaOverlay()
+    with _phase(timings, "title"):
+        if title is None:
+            title = get_page_title_obj(page, language)
         meta.title = page.get_page_title(language)
         if not meta.title:
             meta.title = page.get_title(language)
+    with _phase(timings, "titlemeta"):
+        _resolve_title_meta(meta, page, language, title, index, tags)
+    with _phase(timings, "url"):
+        meta.url = page.get_absolute_url(language)
+    return meta
 
-        if title.meta_description:
-            meta.description = title.meta_description.strip()
-        try:
-            titlemeta = getattr(title, "titlemeta", None)
-            if titlemeta is None:
-                titlemeta = (
-                    TitleMeta.objects.filter(extended_object__page=page, extended_object__language=language)
-                    .order_by("-pk")
-                    .first()
+
+def _get_title_tags(page, language, key, entry, missing, tags):
+    """
+    Add the title tags to the cached language-dependent ``entry`` if it was built before the page became an article.
+    """
+    if tags is None or "_tags" in entry:
+        return entry
+    title_tags = tags.get(page.pk, language)
+    if title_tags is None:
+        return entry
+    missing[key] = dict(entry, _tags=title_tags)
+    return missing[key]
+
+
+def _get_article_tags(page_overlay, tags):
+    """
+    Return the ``tags`` loader if the page is an article, the only pages whose meta use tags.
+    """
+    return tags if page_overlay.get("og_type") == "article" else None
+
+
+def _get_title_overlay(page, language, cached, timings, missing, tags=None):
+    """
+    Return the language-dependent attributes for the page, building them if not in cache.
+
+    Languages resolved to a fallback language share the entry of the fallback language: their own entry is an
+    alias holding only the target language and the URL.
+
+    :param cached: cache entries already fetched
+    :param missing: mapping where the entries to be stored in the cache are added
+    :param tags: tags loader shared with the language-independent entry, only passed for articles
+
+    :return: tuple of attributes and whether they have been found in cache
+    """
+    title_key = get_cache_key(page, language)
+    entry = cached.get(title_key)
+    if entry and ALIAS_KEY not in entry:
+        return _get_title_tags(page, language, title_key, entry, missing, tags), True
+    if entry:
+        alias_key = get_cache_key(page, entry[ALIAS_KEY])
+        if alias_key not in cached:
+            with _phase(timings, "cache"):
+                cached[alias_key] = decompress_entry(get_cache().get(alias_key))
+        # the target may have become an alias itself after its content was deleted: rebuild
+        if cached[alias_key] and ALIAS_KEY not in cached[alias_key]:
+            alias = _get_title_tags(page, entry[ALIAS_KEY], alias_key, cached[alias_key], missing, tags)
+            return dict(alias, url=entry["url"]), True
+    with _phase(timings, "title"):
+        title = get_page_title_obj(page, language)
+        resolved_language = getattr(title, "language", None) or language
+    index = _get_extension_index(page, cached, timings)
+    if resolved_language == language:
+        missing[title_key] = dict(_build_title_overlay(page, language, timings, title, index, tags))
+        return missing[title_key], False
+    alias_key = get_cache_key(page, resolved_language)
+    missing[alias_key] = dict(_build_title_overlay(page, resolved_language, timings, title, index, tags))
+    with _phase(timings, "url"):
+        missing[title_key] = {ALIAS_KEY: resolved_language, "url": page.get_absolute_url(language)}
+    return dict(missing[alias_key], url=missing[title_key]["url"]), False
+
+
+#: Number of pages prefetched together by iter_page_overlays
+PREFETCH_CHUNK_SIZE = 500
+
+
+def _iter_prefetched(pages):
+    """
+    Iterate over the ``pages`` queryset, prefetching in bulk the data used to build their meta.
+    """
+    iterator = pages.iterator(chunk_size=PREFETCH_CHUNK_SIZE)
+    while True:
+        chunk = list(islice(iterator, PREFETCH_CHUNK_SIZE))
+        if not chunk:
+            return
+        _prefetch_pages(chunk)
+        yield from chunk
+
+
+def iter_page_overlays(pages=None):
+    """
+    Build the meta attributes of the given pages (all the pages by default) in all the languages of their site.
+
+    Languages resolved to a fallback share the attributes of the fallback language, with their own URL.
+
+    :param pages: Page queryset
+    :return: iterator of (page, site id, language-independent attributes, language-dependent attributes by language)
+    """
+    from cms.models import Page
+    from cms.utils.i18n import get_language_list
+
+    if pages is None:
+        pages = Page.objects.all()
+    indexes = {}
+    timings = {}
+    pages = pages.order_by("path")
+    tags = _TagsLoader(pages.values("pk"))
+    for page in _iter_prefetched(pages):
+        site_id = _get_site_id(page)
+        if site_id not in indexes:
+            indexes[site_id] = _build_extension_index(site_id)
+        index = indexes[site_id]
+        page_overlay = dict(_build_page_overlay(page, timings, index, tags))
+        title_tags = _get_article_tags(page_overlay, tags)
+        built = {}
+        title_overlays = {}
+        for language in get_language_list(site_id):
+            title = get_page_title_obj(page, language)
+            resolved_language = getattr(title, "language", None) or language
+            if resolved_language not in built:
+                built[resolved_language] = dict(
+                    _build_title_overlay(page, resolved_language, timings, title, index, title_tags)
                 )
-            if titlemeta is None:
-                raise TitleMeta.DoesNotExist
-            if titlemeta.description:
-                meta.description = titlemeta.description.strip()
-            if titlemeta.keywords:
-                meta.keywords = titlemeta.keywords.strip().split(",")
-            meta.locale = titlemeta.locale
-            meta.og_description = titlemeta.og_description.strip()
-            if not meta.og_description:
-                meta.og_description = meta.description
-            meta.twitter_description = titlemeta.twitter_description.strip()
-            if not meta.twitter_description:
-                meta.twitter_description = meta.description
-            if titlemeta.image:
-                meta.image = titlemeta.image.canonical_url or titlemeta.image.url
-            meta.schemaorg_description = titlemeta.schemaorg_description.strip()
-            if not meta.schemaorg_description:
-                meta.schemaorg_description = meta.description
-            meta.schemaorg_name = titlemeta.schemaorg_name
-            if not meta.schemaorg_name:
-                meta.schemaorg_name = meta.title
-            for item in titlemeta.extra.all():
-                attribute = item.attribute
-                if not attribute:
-                    attribute = item.DEFAULT_ATTRIBUTE
-                meta.extra_custom_props.append((attribute, item.name, item.value))
-        except (TitleMeta.DoesNotExist, AttributeError):
-            # Skipping title-level metas
-            if meta.description:
-                meta.og_description = meta.description
-                meta.schemaorg_description = meta.description
-                meta.twitter_description = meta.description
-        defaults = {
-            "object_type": meta_settings.get_setting("FB_TYPE"),
-            "og_type": meta_settings.get_setting("FB_TYPE"),
-            "og_app_id": meta_settings.get_setting("FB_APPID"),
-            "fb_pages": meta_settings.get_setting("FB_PAGES"),
-            "og_profile_id": meta_settings.get_setting("FB_PROFILE_ID"),
-            "og_publisher": meta_settings.get_setting("FB_PUBLISHER"),
-            "og_author_url": meta_settings.get_setting("FB_AUTHOR_URL"),
-            "twitter_type": meta_settings.get_setting("TWITTER_TYPE"),
-            "twitter_site": meta_settings.get_setting("TWITTER_SITE"),
-            "twitter_author": meta_settings.get_setting("TWITTER_AUTHOR"),
-            "schemaorg_type": meta_settings.get_setting("SCHEMAORG_TYPE"),
-            "schemaorg_datePublished": publication_date.isoformat() if publication_date else None,
-            "schemaorg_dateModified": changed_date.isoformat() if changed_date else None,
-        }
+            if resolved_language == language:
+                title_overlays[language] = built[language]
+            else:
+                title_overlays[language] = dict(built[resolved_language], url=page.get_absolute_url(language))
+        yield page, site_id, page_overlay, title_overlays
+
+
+def _get_prebuilt_overlay(page, language):
+    """
+    Return the page-specific attributes from the artifact or the snapshot, if enabled and containing the page.
+
+    :return: tuple of attributes and default image URL, or ``(None, None)`` if not available
+    """
+    if get_setting("ARTIFACT"):
+        from .artifact import get_artifact
+
+        artifact = get_artifact()
+        overlay = artifact.get(_get_site_id(page), page.pk, language) if artifact is not None else None
+        if overlay is not None:
+            return overlay, artifact.default_image
+    if get_setting("SNAPSHOT"):
+        from .snapshot import get_snapshot
+
+        snapshot = get_snapshot()
+        overlays = snapshot.get(page.pk, language)
+        if overlays is not None:
+            return _merge_overlays(*overlays), snapshot.default_image
+    return None, None
+
+
+def _get_prebuilt_meta(page, language):
+    """
+    Compose the meta from the artifact or the in-process snapshot.
+
+    :return: Meta instance or ``None`` if the page is not available there
+    """
+    timings = {}
+    with _phase(timings, "prebuilt"):
+        overlay, default_image = _get_prebuilt_overlay(page, language)
+    if overlay is None:
+        return None
+    with _phase(timings, "defaults"):
+        meta = _compose_meta(overlay, {get_default_image_cache_key(): default_image})
+    page_meta_resolved.send(
+        sender=page.__class__,
+        page=page,
+        language=language,
+        keys=[],
+        hit=True,
+        meta=meta,
+        entries={},
+        timings=timings,
+        queries=[],
+    )
+    return meta
+
+
+def _is_draft_request(request):
+    """
+    Return whether the toolbar of the request is in edit or preview mode.
+    """
+    toolbar = getattr(request, "toolbar", None)
+    if toolbar is None:
+        return False
+    return bool(getattr(toolbar, "edit_mode_active", False) or getattr(toolbar, "preview_mode_active", False))
+
+
+def _get_draft_content(request, page, language):
+    """
+    Return the page content rendered by the toolbar in edit or preview mode.
+
+    :return: tuple of whether the request is in edit or preview mode and the page content being edited (``None``
+             if the toolbar object is not a content of the page in the given language)
+    """
+    if not _is_draft_request(request):
+        return False, None
+    toolbar = request.toolbar
+    content = toolbar.get_object() if hasattr(toolbar, "get_object") else None
+    if getattr(content, "page_id", None) != page.pk or getattr(content, "language", None) != language:
+        content = None
+    return True, content
+
+
+def _get_draft_meta(page, language, content, tags=None, index=None, cached=None):
+    """
+    Build the meta for the page content being edited from the database, without reading or writing the cache.
+
+    :param tags: tags loader, ``index`` (built from the database, as drafts do not update the cached one) and
+                 ``cached`` default image shared by :py:func:`_get_draft_meta_many`
+    """
+    timings = {}
+    if tags is None:
+        tags = _TagsLoader([page.pk])
+    page_overlay = _build_page_overlay(page, timings, index, tags)
+    title_overlay = _build_title_overlay(
+        page, language, timings, content, index, tags=_get_article_tags(page_overlay, tags)
+    )
+    if content is not None:
+        title_overlay.title = getattr(content, "page_title", None) or content.title
+    return _compose_meta(_merge_overlays(page_overlay, title_overlay), cached or {})
+
+
+def _get_draft_meta_many(pages, language, request):
+    """
+    Build the meta for several pages in toolbar edit or preview mode, fetching their contents, URLs, extensions and
+    tags in bulk, without reading or writing the cache.
+    """
+    unique = {}
+    for page in pages:
         try:
-            pagemeta = page.pagemeta
-            meta.object_type = pagemeta.og_type
-            meta.og_type = pagemeta.og_type
-            meta.og_app_id = pagemeta.og_app_id
-            meta.fb_pages = pagemeta.fb_pages
-            meta.og_profile_id = pagemeta.og_author_fbid
-            meta.twitter_type = pagemeta.twitter_type
-            meta.twitter_site = pagemeta.twitter_site
-            meta.twitter_author = pagemeta.twitter_author
-            meta.schemaorg_type = pagemeta.schemaorg_type
-            meta.robots = pagemeta.robots_list
-            if publication_date:
-                meta.published_time = publication_date.isoformat()
-            if changed_date:
-                meta.modified_time = changed_date.isoformat()
-            if publication_end_date:
-                meta.expiration_time = publication_end_date.isoformat()
-            if meta.og_type == "article":
-                meta.og_publisher = pagemeta.og_publisher
-                meta.og_author_url = pagemeta.og_author_url
-                try:
-                    from djangocms_page_tags.utils import get_page_tags, get_title_tags
-
-                    tags = list(get_title_tags(page, language))
-                    tags += list(get_page_tags(page))
-                    meta.tag = ",".join([tag.name for tag in tags])
-                except ImportError:
-                    # djangocms-page-tags not available
-                    pass
-            if not meta.image and pagemeta.image:
-                meta.image = pagemeta.image.canonical_url or pagemeta.image.url
-            for item in pagemeta.extra.all():
-                attribute = item.attribute
-                if not attribute:
-                    attribute = item.DEFAULT_ATTRIBUTE
-                meta.extra_custom_props.append((attribute, item.name, item.value))
-        except PageMeta.DoesNotExist:
-            pass
-        for attr, val in defaults.items():
-            if not getattr(meta, attr, "") and val:
-                setattr(meta, attr, val)
-        if not meta.image and default_meta_image:
-            meta.image = default_meta_image.canonical_url or default_meta_image.url
-        meta.url = page.get_absolute_url(language)
-        meta.schemaorg_url = meta.url
-        meta.schemaorg_image = meta.image
-        cache.set(meta_key, meta)
+            get_page_cache_key(page)
+        except AttributeError:
+            continue
+        unique[page.pk] = page
+    _prefetch_pages(list(unique.values()))
+    tags = _TagsLoader(list(unique))
+    indexes = {}
+    cached = {get_default_image_cache_key(): _get_default_image({})}
+    metas = {}
+    for page in unique.values():
+        site_id = _get_site_id(page)
+        if site_id not in indexes:
+            indexes[site_id] = _build_extension_index(site_id)
+        __, content = _get_draft_content(request, page, language)
+        metas[page.pk] = _get_draft_meta(page, language, content, tags, indexes[site_id], cached)
+    return [metas.get(getattr(page, "pk", None)) for page in pages]
+
+
+def get_page_meta(page, language, request=None):
+    """
+    Retrieves all the meta information for the page in the given language
+
+    Only the page-specific attributes are cached, split in a language-independent entry (from ``PageMeta``) and
+    a language-dependent one (from ``TitleMeta``); site-wide defaults are merged when reading.
+    If :ref:`PAGE_META_ARTIFACT` or :ref:`PAGE_META_SNAPSHOT` are enabled, the attributes are read from the
+    artifact file or the in-process snapshot instead.
+    If ``request`` is in toolbar edit or preview mode, the meta is built from the content being edited and never
+    cached, so draft content does not leak to the public entries.
+    Otherwise the meta is memoized on the ``request``: further lookups of the same page and language in the
+    same request return the same instance without accessing the cache.
+
+    :param page: a Page instance
+    :param lang: a language code
+    :param request: current request
+
+    :return: Meta instance
+    :type: object
+    """
+    try:
+        page_key = get_page_cache_key(page)
+        title_key = get_cache_key(page, language)
+    except AttributeError:
+        return None
+    is_draft, content = _get_draft_content(request, page, language)
+    if is_draft:
+        return _get_draft_meta(page, language, content)
+    if request is not None:
+        memo = _get_request_memo(request)
+        if (page.pk, language) not in memo:
+            memo[(page.pk, language)] = get_page_meta(page, language)
+        return memo[(page.pk, language)]
+    if get_setting("ARTIFACT") or get_setting("SNAPSHOT"):
+        meta = _get_prebuilt_meta(page, language)
+        if meta is not None:
+            return meta
+    cache = get_cache()
+    timings = {}
+    slow_build_threshold = get_setting("SLOW_BUILD_THRESHOLD")
+    with capture_queries(enabled=has_query_consumers() or slow_build_threshold) as recorder:
+        with _phase(timings, "cache"):
+            image_key = get_default_image_cache_key()
+            cached = {
+                key: decompress_entry(value) for key, value in cache.get_many([page_key, title_key, image_key]).items()
+            }
+        meta, missing, hit = _resolve_from_cache(page, language, (page_key, title_key), cached, timings)
+        if missing:
+            with _phase(timings, "cache"):
+                cache.set_many({key: compress_entry(value) for key, value in missing.items()}, get_cache_timeout(page))
+    _send_resolved(page, language, (page_key, title_key), cached, missing, meta, hit, timings, recorder.queries)
+    return meta
+
+
+def _get_request_memo(request):
+    """
+    Return the Meta instances memoized on the ``request``, by page id and language.
+    """
+    memo = getattr(request, "_page_meta_memo", None)
+    if memo is None:
+        memo = request._page_meta_memo = {}
+    return memo
+
+
+def _resolve_from_cache(page, language, keys, cached, timings, tags=None):
+    """
+    Compose the meta of the page from the ``cached`` entries already fetched, building the missing ones.
+
+    :param keys: language-independent and language-dependent cache keys of the page
+    :param tags: tags loader shared by the pages resolved together
+
+    :return: tuple of Meta instance, entries to be stored in the cache and whether all the entries were in cache
+    """
+    page_key, title_key = keys
+    if tags is None:
+        tags = _TagsLoader([page.pk])
+    missing = {}
+    page_overlay = cached.get(page_key)
+    if page_overlay is None:
+        index = _get_extension_index(page, cached, timings)
+        page_overlay = missing[page_key] = dict(_build_page_overlay(page, timings, index, tags))
+    title_overlay, hit = _get_title_overlay(
+        page, language, cached, timings, missing, _get_article_tags(page_overlay, tags)
+    )
+    with _phase(timings, "defaults"):
+        meta = _compose_meta(_merge_overlays(page_overlay, title_overlay), cached)
+    return meta, missing, hit and page_key not in missing
+
+
+def _send_resolved(page, language, keys, cached, missing, meta, hit, timings, queries):
+    """
+    Log the build if slow and send ``page_meta_resolved`` with the cache entries of the page.
+
+    :param keys: cache keys looked up for the page
+    """
+    slow_build_threshold = get_setting("SLOW_BUILD_THRESHOLD")
+    if not hit and slow_build_threshold:
+        _log_slow_build(page, language, timings, queries, slow_build_threshold)
+    page_keys = {*keys, *missing}
+    for key in keys:
+        entry = cached.get(key) or {}
+        if ALIAS_KEY in entry:
+            page_keys.add(get_cache_key(page, entry[ALIAS_KEY]))
+    entries = {key: value for key, value in {**cached, **missing}.items() if value is not None and key in page_keys}
+    page_meta_resolved.send(
+        sender=page.__class__,
+        page=page,
+        language=language,
+        keys=list(entries),
+        hit=hit,
+        meta=meta,
+        entries=entries,
+        timings=timings,
+        queries=queries,
+    )
+
+
+def _prefetch_pages(pages):
+    """
+    Fetch in bulk the page contents, URLs and extensions used to build the meta of ``pages``.
+    """
+    from cms.models import Page
+    from django.db.models import prefetch_related_objects
+
+    lookups = ["pagemeta__extra", "pagemeta__image"]
+    if hasattr(Page, "pagecontent_set"):
+        lookups += ["urls", "pagecontent_set__titlemeta__extra", "pagecontent_set__titlemeta__image"]
+    prefetch_related_objects(pages, *lookups)
+
+
+def get_page_meta_many(pages, language, request=None):
+    """
+    Retrieves the meta information for several pages in the given language
+
+    All the cache entries are fetched with a single request (plus one for the entries of fallback languages, if
+    any) and stored with a single request; the pages not in cache are built together, fetching their contents,
+    URLs, extensions and tags in bulk.
+    Meta instances are memoized on the ``request`` as in :py:func:`get_page_meta`; in toolbar edit or preview
+    mode they are built from the database, fetching the data of all the pages in bulk.
+    ``page_meta_resolved`` is sent for each page: the time of the bulk requests is split among the pages and their
+    queries are reported with the first page.
+
+    :param pages: iterable of Page instances
+    :param language: a language code
+    :param request: current request
+
+    :return: list of Meta instances, in the same order as ``pages``
+    """
+    pages = list(pages)
+    memo = {}
+    if request is not None:
+        if _is_draft_request(request):
+            return _get_draft_meta_many(pages, language, request)
+        memo = _get_request_memo(request)
+    keys = {}
+    for page in pages:
+        try:
+            keys[page.pk] = (get_page_cache_key(page), get_cache_key(page, language))
+        except AttributeError:
+            memo[(getattr(page, "pk", None), language)] = None
+    pending = list(
+        {
+            page.pk: page for page in pages if getattr(page, "pk", None) in keys and (page.pk, language) not in memo
+        }.values()
+    )
+    if get_setting("ARTIFACT") or get_setting("SNAPSHOT"):
+        for page in pending:
+            memo[(page.pk, language)] = get_page_meta(page, language)
+        pending = []
+    if pending:
+        cache = get_cache()
+        capture = bool(has_query_consumers() or get_setting("SLOW_BUILD_THRESHOLD"))
+        batch_timings = {}
+        with capture_queries(enabled=capture) as batch_recorder:
+            with _phase(batch_timings, "cache"):
+                image_key = get_default_image_cache_key()
+                request_keys = [key for page in pending for key in keys[page.pk]] + [image_key]
+                cached = {key: decompress_entry(value) for key, value in cache.get_many(request_keys).items()}
+                alias_keys = {
+                    get_cache_key(page, cached[keys[page.pk][1]][ALIAS_KEY])
+                    for page in pending
+                    if ALIAS_KEY in (cached.get(keys[page.pk][1]) or {})
+                }
+                if alias_keys:
+                    for key in alias_keys:
+                        cached[key] = None
+                    cached.update({key: decompress_entry(value) for key, value in cache.get_many(alias_keys).items()})
+            with _phase(batch_timings, "prefetch"):
+                _prefetch_pages([page for page in pending if any(cached.get(key) is None for key in keys[page.pk])])
+            with _phase(batch_timings, "defaults"):
+                cached[image_key] = _get_default_image(cached)
+        tags = _TagsLoader([page.pk for page in pending])
+        batch_queries = batch_recorder.queries
+        missing = {}
+        for page in pending:
+            # the time of the bulk requests is split among the pages, their queries are reported with the first one
+            timings = {phase: elapsed / len(pending) for phase, elapsed in batch_timings.items()}
+            with capture_queries(enabled=capture) as recorder:
+                meta, page_missing, hit = _resolve_from_cache(page, language, keys[page.pk], cached, timings, tags)
+            memo[(page.pk, language)] = meta
+            if page_missing:
+                missing.setdefault(get_cache_timeout(page), {}).update(page_missing)
+            queries = batch_queries + recorder.queries
+            batch_queries = []
+            _send_resolved(page, language, keys[page.pk], cached, page_missing, meta, hit, timings, queries)
+        for timeout, entries in missing.items():
+            cache.set_many({key: compress_entry(value) for key, value in entries.items()}, timeout)
+    return [memo.get((getattr(page, "pk", None), language)) for page in pages]
+
+
+def refresh_page_meta(page, languages=()):
+    """
+    Rebuild and store in the cache the entries of the page in the given languages or, if no language is given,
+    its language-independent entry.
+
+    :param page: a Page instance
+    :param languages: language codes
+    """
+    cache = get_cache()
+    timings = {}
+    cached = {}
+    page_key = get_page_cache_key(page)
+    if languages:
+        # the language-independent entry is only needed to check whether the page is an article
+        cached = {key: decompress_entry(value) for key, value in cache.get_many([page_key]).items()}
+    tags = _TagsLoader([page.pk])
+    missing = {}
+    page_overlay = cached.get(page_key)
+    if page_overlay is None:
+        index = _get_extension_index(page, cached, timings)
+        page_overlay = missing[page_key] = dict(_build_page_overlay(page, timings, index, tags))
+    for language in languages:
+        _get_title_overlay(page, language, cached, timings, missing, _get_article_tags(page_overlay, tags))
+    cache.set_many({key: compress_entry(value) for key, value in missing.items()}, get_cache_timeout(page))
+
+
+#: Attributes of LazyPageMeta resolved from the language-dependent entry only
+LAZY_TITLE_FIELDS = (
+    "title",
+    "url",
+    "description",
+    "keywords",
+    "locale",
+    "og_description",
+    "twitter_description",
+    "schemaorg_description",
+    "schemaorg_name",
+)
+
+
+def _get_title_meta(page, language):
+    """
+    Create a Meta instance with the language-dependent attributes of the page only, fetching a single cache entry.
+    """
+    from meta.views import Meta
+
+    cache = get_cache()
+    timings = {}
+    title_key = get_cache_key(page, language)
+    with capture_queries(enabled=has_query_consumers() or get_setting("SLOW_BUILD_THRESHOLD")) as recorder:
+        with _phase(timings, "cache"):
+            cached = {key: decompress_entry(value) for key, value in cache.get_many([title_key]).items()}
+        missing = {}
+        overlay, hit = _get_title_overlay(page, language, cached, timings, missing)
+        if missing:
+            with _phase(timings, "cache"):
+                cache.set_many({key: compress_entry(value) for key, value in missing.items()}, get_cache_timeout(page))
+    meta = Meta()
+    for attr, val in overlay.items():
+        if attr != "_tags":
+            setattr(meta, attr, val)
+    _send_resolved(page, language, (title_key,), cached, missing, meta, hit, timings, recorder.queries)
     return meta
 
 
+class LazyPageMeta:
+    """
+    Proxy of the Meta instance of the page, resolved on first attribute access.
+
+    Attributes in :py:data:`LAZY_TITLE_FIELDS` are read from the language-dependent cache entry only; accessing
+    any other attribute resolves the whole meta with :py:func:`get_page_meta` (once), which is then used for all
+    the attributes. Both are memoized on the ``request``, so proxies of the same page and language share them.
+
+    :param page: a Page instance
+    :param language: a language code
+    :param request: current request
+    """
+
+    def __init__(self, page, language, request=None):
+        self._page = page
+        self._language = language
+        self._request = request
+        self._meta = None
+        self._title_meta = None
+
+    def _get_meta(self):
+        if self._meta is None:
+            self._meta = get_page_meta(self._page, self._language, self._request)
+        return self._meta
+
+    def _get_memo(self):
+        if self._request is None:
+            return {}
+        return _get_request_memo(self._request)
+
+    def _is_resolved(self):
+        if self._meta is None:
+            memo = self._get_memo()
+            pk = getattr(self._page, "pk", None)
+            self._meta = memo.get((pk, self._language))
+            if self._title_meta is None:
+                self._title_meta = memo.get((pk, self._language, "title"))
+        return self._meta is not None
+
+    def _get_title_meta(self):
+        if self._title_meta is None:
+            self._title_meta = _get_title_meta(self._page, self._language)
+            self._get_memo()[(self._page.pk, self._language, "title")] = self._title_meta
+        return self._title_meta
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in LAZY_TITLE_FIELDS and not self._is_resolved() and self._can_use_title_meta():
+            return getattr(self._get_title_meta(), name)
+        return getattr(self._get_meta(), name)
+
+    def _can_use_title_meta(self):
+        # prebuilt sources are cheaper than the cache, drafts are never cached
+        if get_setting("ARTIFACT") or get_setting("SNAPSHOT") or not hasattr(self._page, "site_id"):
+            return False
+        return not _get_draft_content(self._request, self._page, self._language)[0]
+
+    def __bool__(self):
+        # get_page_meta only returns None for objects without cache keys, checked without resolving the meta
+        if self._meta is not None:
+            return True
+        try:
+            get_cache_key(self._page, self._language)
+        except AttributeError:
+            return False
+        return True
+
+
 def get_metatags(request):
     language = get_language_from_request(request, check_path=True)
-    meta = get_page_meta(request.current_page, language)
+    meta = get_page_meta(request.current_page, language, request)
     return mark_safe(
         render_to_string(request=request, template_name="djangocms_page_meta/meta.html", context={"meta": meta})
     )
@@ -0,0 +1,12 @@
+from django.http import HttpResponse
+
+from .metrics import get_metrics_text
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics(request):
+    """
+    Expose the page meta metrics to Prometheus.
+    """
+    return HttpResponse(get_metrics_text(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -85,6 +85,11 @@ class BaseTest(BaseTestCase):
             return page.get_draft_object()
         return page
 
+    def get_pages(self):
+        # fixtures are created as if committed, so that their invalidations do not join the ones under test
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().get_pages()
+
     def setUp(self):
         super().setUp()
         cache.clear()
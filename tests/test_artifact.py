@@ -0,0 +1,78 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from djangocms_page_meta import models
+from djangocms_page_meta.artifact import Artifact, get_artifact
+from djangocms_page_meta.utils import get_page_meta
+
+from . import BaseTest
+
+
+class ArtifactTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "page_meta.bin")
+
+    def _export(self, **kwargs):
+        out = StringIO()
+        call_command("page_meta_export_artifact", self.path, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_export(self):
+        page1, page2 = self.get_pages()
+        models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"), description="english")
+        self.assertIn("Exported 6 entries", self._export())
+
+        artifact = Artifact(self.path)
+        self.addCleanup(artifact.close)
+        self.assertEqual(len(artifact), 6)
+        self.assertEqual(artifact.get(page1.site_id, page1.pk, "en")["description"], "english")
+        self.assertEqual(artifact.get(page2.site_id, page2.pk, "it")["url"], page2.get_absolute_url("it"))
+        self.assertIsNone(artifact.get(page1.site_id, page1.pk, "de"))
+        self.assertIsNone(artifact.get(page1.site_id + 1, page1.pk, "en"))
+        self.assertIsNone(artifact.get(page1.site_id, page2.pk + 1, "en"))
+
+    def test_export_site(self):
+        page1, __ = self.get_pages()
+        self.assertIn("Exported 0 entries", self._export(site=page1.site_id + 1))
+        artifact = Artifact(self.path)
+        self.addCleanup(artifact.close)
+        self.assertIsNone(artifact.get(page1.site_id, page1.pk, "en"))
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as fileobj:
+            fileobj.write(b"\0" * 100)
+        with self.assertRaises(ValueError):
+            Artifact(self.path)
+
+    def test_missing_file(self):
+        page1, __ = self.get_pages()
+        self.addCleanup(get_artifact.cache_clear)
+        with override_settings(PAGE_META_ARTIFACT=self.path):
+            with self.assertLogs("djangocms_page_meta.artifact", "WARNING") as logs:
+                self.assertEqual(get_page_meta(page1, "en").title, "page one")
+                self.assertEqual(get_page_meta(page1, "it").title, "pagina uno")
+            self.assertEqual(len(logs.output), 1)
+            self.assertIn(self.path, logs.output[0])
+            # the cache is used instead
+            with self.assertNumQueries(0):
+                self.assertEqual(get_page_meta(page1, "en").title, "page one")
+
+    def test_get_page_meta(self):
+        page1, __ = self.get_pages()
+        models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"), description="english")
+        self._export()
+        with override_settings(PAGE_META_ARTIFACT=self.path):
+            with self.assertNumQueries(0):
+                meta = get_page_meta(page1, "en")
+            self.assertEqual(meta.description, "english")
+            self.assertEqual(meta.url, "http://example.com/en/page-one/")
+            self.assertEqual(meta.twitter_type, "summary")
+            # languages not in the artifact are resolved as usual
+            self.assertTrue(get_page_meta(page1, "de").title)
@@ -0,0 +1,38 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from djangocms_page_meta import models
+from djangocms_page_meta.utils import get_page_meta
+
+from . import BaseTest
+
+
+class CacheReportTest(BaseTest):
+    def test_report(self):
+        page1, page2 = self.get_pages()
+        title_meta = models.TitleMeta.objects.create(
+            extended_object=self.get_title_obj(page1, "en"), description="long description " * 50
+        )
+        models.GenericMetaAttribute.objects.create(title=title_meta, attribute="custom", name="attr", value="foo")
+        page1.reload()
+        get_page_meta(page1, "en")
+        get_page_meta(page1, "it")
+        get_page_meta(page2, "en")
+
+        out = StringIO()
+        call_command("page_meta_cache_report", top=1, chunk_size=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn("Cached entries: 5 / 8 keys", output)
+        self.assertIn("Average size:", output)
+        self.assertIn("  page {} (en): ".format(page1.pk), output)
+        # description is stripped and copied to og / twitter / schema.org descriptions
+        self.assertIn("3396 description chars, 1 extra attributes", output)
+        self.assertEqual(output.count("  page "), 1)
+
+    def test_report_empty(self):
+        self.get_pages()
+        out = StringIO()
+        call_command("page_meta_cache_report", stdout=out)
+        self.assertIn("Cached entries: 0 / 8 keys", out.getvalue())
+        self.assertNotIn("Average size:", out.getvalue())
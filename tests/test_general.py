@@ -1,13 +1,38 @@
+import time
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from cms.api import create_page, create_page_content
+from cms.operations import MOVE_PAGE
+from cms.operations.helpers import send_post_page_operation
 from django.conf import settings
-from django.core.cache import cache
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.db import connection, transaction
+from django.db.models.signals import post_save
 from django.template.base import Parser
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.utils.functional import SimpleLazyObject
 
 from djangocms_page_meta import models
 from djangocms_page_meta.forms import PageMetaAdminForm, TitleMetaAdminForm
+from djangocms_page_meta.signals import page_meta_invalidated, page_meta_resolved
 from djangocms_page_meta.templatetags.page_meta_tags import MetaFromPage
-from djangocms_page_meta.utils import get_cache_key, get_page_meta
+from djangocms_page_meta.utils import (
+    CACHE_SCHEMA_VERSION,
+    get_cache,
+    get_cache_key,
+    get_cache_timeout,
+    get_default_image_cache_key,
+    get_index_cache_key,
+    get_page_cache_key,
+    get_page_meta,
+    get_page_meta_many,
+    get_schema_fingerprint,
+    get_tags_many,
+)
 
 from . import BaseTest, DummyTokens
 
@@ -141,6 +166,274 @@ class PageMetaUtilsTest(BaseTest):
         meta = get_page_meta(request.current_page, "en")
         self.assertIsNone(meta)
 
+    def test_cached_overlay(self):
+        """
+        Only page-specific attributes are cached, defaults are merged at read time
+        """
+        page, __ = self.get_pages()
+        meta = get_page_meta(page, "en")
+        self.assertEqual(meta.twitter_type, "summary")
+        self.assertFalse(meta.image)
+        entry = cache.get(get_cache_key(page, "en"))
+        self.assertEqual(entry["title"], "page one")
+        self.assertNotIn("twitter_type", entry)
+        self.assertNotIn("og_app_id", entry)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            default_meta_image = models.DefaultMetaImage.objects.first()
+            default_meta_image.image = self.create_filer_image_object()
+            default_meta_image.save()
+        self.assertEqual(cache.get(get_cache_key(page, "en")), entry)
+        meta = get_page_meta(page, "en")
+        self.assertEqual(meta.image, f"http://example.com{default_meta_image.image.url}")
+        self.assertEqual(meta.schemaorg_image, meta.image)
+
+    def test_language_fallback_alias(self):
+        """
+        Languages resolved to a fallback share the cache entry of the fallback language
+        """
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"), description="english")
+            self.get_title_obj(page, "it").delete()
+        page = page.__class__.objects.get(pk=page.pk)
+
+        meta_it = get_page_meta(page, "it")
+        meta_en = get_page_meta(page, "en")
+        self.assertEqual(meta_it.description, "english")
+        self.assertEqual(meta_it.title, meta_en.title)
+        self.assertTrue(meta_it.url.startswith("http://example.com/it/"))
+        self.assertEqual(meta_en.url, "http://example.com/en/page-one/")
+        alias = cache.get(get_cache_key(page, "it"))
+        self.assertEqual(alias, {"_alias": "en", "url": page.get_absolute_url("it")})
+        self.assertEqual(cache.get(get_cache_key(page, "en"))["description"], "english")
+
+        # fallback entry is rebuilt when missing
+        cache.delete(get_cache_key(page, "en"))
+        self.assertEqual(get_page_meta(page, "it").description, "english")
+        self.assertEqual(cache.get(get_cache_key(page, "en"))["description"], "english")
+
+        # adding the translation invalidates the alias
+        with self.captureOnCommitCallbacks(execute=True):
+            create_page_content("it", "pagina uno", page)
+        page = page.__class__.objects.get(pk=page.pk)
+        self.assertIsNone(cache.get(get_cache_key(page, "it")))
+        self.assertEqual(get_page_meta(page, "it").title, "pagina uno")
+
+    def test_language_fallback_alias_chain(self):
+        """
+        Aliases of languages which became aliases themselves are rebuilt
+        """
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.get_title_obj(page, "it").delete()
+        page = page.__class__.objects.get(pk=page.pk)
+        get_page_meta(page, "it")
+        self.assertEqual(cache.get(get_cache_key(page, "it"))["_alias"], "en")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.get_title_obj(page, "en").delete()
+        page = page.__class__.objects.get(pk=page.pk)
+        get_page_meta(page, "en")
+        self.assertEqual(cache.get(get_cache_key(page, "en"))["_alias"], "fr-fr")
+
+        page = page.__class__.objects.get(pk=page.pk)
+        for meta in (get_page_meta(page, "it"), get_page_meta_many([page], "it")[0]):
+            self.assertEqual(meta.title, "page un")
+            self.assertFalse(hasattr(meta, "_alias"))
+        self.assertEqual(cache.get(get_cache_key(page, "it"))["_alias"], "fr-fr")
+
+    def test_extension_index(self):
+        """
+        Extension lookups are skipped for pages without extensions, according to the cached site index
+        """
+        page, __ = self.get_pages()
+        get_page_meta(page, "en")
+        self.assertEqual(cache.get(get_index_cache_key(page.site_id))["pages"], frozenset())
+
+        cache.delete_many([get_page_cache_key(page), get_cache_key(page, "en")])
+        with CaptureQueriesContext(connection) as ctx:
+            get_page_meta(page, "en")
+        self.assertFalse([query for query in ctx.captured_queries if "djangocms_page_meta" in query["sql"]])
+
+        # creating an extension invalidates the index
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta = models.PageMeta.objects.create(extended_object=page, og_type="article")
+        self.assertIsNone(cache.get(get_index_cache_key(page.site_id)))
+        page = page.__class__.objects.get(pk=page.pk)
+        self.assertEqual(get_page_meta(page, "en").og_type, "article")
+        self.assertEqual(cache.get(get_index_cache_key(page.site_id))["pages"], frozenset([page.pk]))
+
+        # as well as adding extra attributes
+        with self.captureOnCommitCallbacks(execute=True):
+            models.GenericMetaAttribute.objects.create(page=page_meta, attribute="name", name="custom", value="attr")
+        self.assertIsNone(cache.get(get_index_cache_key(page.site_id)))
+        page = page.__class__.objects.get(pk=page.pk)
+        self.assertEqual(get_page_meta(page, "en").extra_custom_props, [("name", "custom", "attr")])
+
+        # changing extra attributes keeps the index
+        with self.captureOnCommitCallbacks(execute=True):
+            attribute = models.GenericMetaAttribute.objects.get(page=page_meta)
+            attribute.value = "changed"
+            attribute.save()
+        self.assertTrue(cache.get(get_index_cache_key(page.site_id)))
+
+        # lookups hitting the cache do not fetch the index
+        get_page_meta(page, "en")
+        page_cache = get_cache()
+        with patch.object(page_cache, "get_many", wraps=page_cache.get_many) as get_many:
+            with patch.object(page_cache, "get", wraps=page_cache.get) as get:
+                get_page_meta(page, "en")
+        self.assertNotIn(get_index_cache_key(page.site_id), get_many.call_args[0][0])
+        self.assertNotIn(get_index_cache_key(page.site_id), [call[0][0] for call in get.call_args_list])
+
+    @override_settings(PAGE_META_CACHE="page_meta")
+    def test_cache_alias(self):
+        page_meta_cache = caches["page_meta"]
+        self.addCleanup(page_meta_cache.clear)
+        page, __ = self.get_pages()
+        get_page_meta(page, "en")
+        key = get_cache_key(page, "en")
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(page_meta_cache.get(key)["title"], "page one")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"), description="english")
+        self.assertIsNone(page_meta_cache.get(key))
+
+    def test_cache_compression(self):
+        page, __ = self.get_pages()
+        models.TitleMeta.objects.create(
+            extended_object=self.get_title_obj(page, "en"), description="long description " * 50
+        )
+        page = page.__class__.objects.get(pk=page.pk)
+        key = get_cache_key(page, "en")
+        with override_settings(PAGE_META_COMPRESSION="zlib", PAGE_META_COMPRESSION_THRESHOLD=512):
+            meta = get_page_meta(page, "en")
+            # small entries are stored as they are
+            self.assertIsInstance(cache.get(get_page_cache_key(page)), dict)
+            self.assertEqual(cache.get(key).algorithm, "zlib")
+            self.assertEqual(get_page_meta(page, "en").description, meta.description)
+        # compressed entries are still readable after disabling compression
+        self.assertEqual(get_page_meta(page, "en").description, meta.description)
+        self.assertTrue(meta.description.startswith("long description"))
+
+        cache.clear()
+        with override_settings(PAGE_META_COMPRESSION="lzma", PAGE_META_COMPRESSION_THRESHOLD=0):
+            meta = get_page_meta(page, "it")
+            self.assertEqual(cache.get(get_page_cache_key(page)).algorithm, "lzma")
+            self.assertEqual(get_page_meta(page, "it").title, meta.title)
+
+    def test_request_memo(self):
+        page1, page2 = self.get_pages()
+        request = self.get_page_request(page1, self.user, "/")
+        meta = get_page_meta(page1, "en", request)
+        with self.assertNumQueries(0):
+            with patch("djangocms_page_meta.utils.get_cache") as get_cache:
+                self.assertIs(get_page_meta(page1, "en", request), meta)
+        get_cache.assert_not_called()
+        self.assertIsNot(get_page_meta(page1, "it", request), meta)
+        self.assertIsNot(get_page_meta(page2, "en", request), meta)
+        # a new request resolves the meta again
+        self.assertIsNot(get_page_meta(page1, "en", self.get_page_request(page1, self.user, "/")), meta)
+
+    def test_draft_mode(self):
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            title = self.get_title_obj(page, "en")
+            models.TitleMeta.objects.create(extended_object=title, description="draft")
+        request = self.get_page_request(page, self.user, "/")
+        request.toolbar = Mock(edit_mode_active=True, preview_mode_active=False)
+        request.toolbar.get_object.return_value = title
+
+        meta = get_page_meta(page, "en", request)
+        self.assertEqual(meta.description, "draft")
+        self.assertEqual(meta.title, title.title)
+        self.assertIsNone(cache.get(get_cache_key(page, "en")))
+        self.assertIsNone(cache.get(get_page_cache_key(page)))
+
+        # public lookups are cached as usual
+        request.toolbar.edit_mode_active = False
+        self.assertEqual(get_page_meta(page, "en", request).description, "draft")
+        self.assertEqual(cache.get(get_cache_key(page, "en"))["description"], "draft")
+
+    def test_cache_timeout(self):
+        page, __ = self.get_pages()
+        now = timezone.now()
+        page.publication_date = now - timedelta(days=1)
+        self.assertEqual(get_cache_timeout(page), 300)
+        with override_settings(PAGE_META_CACHE_TIMEOUT=86400):
+            self.assertEqual(get_cache_timeout(page), 86400)
+            page.publication_end_date = now + timedelta(hours=1)
+            self.assertEqual(get_cache_timeout(page), 3600)
+            page.publication_date = now + timedelta(minutes=10)
+            self.assertEqual(get_cache_timeout(page), 600)
+        with override_settings(PAGE_META_CACHE_TIMEOUT=None):
+            self.assertEqual(get_cache_timeout(page), 600)
+            page.publication_date = now - timedelta(days=1)
+            page.publication_end_date = None
+            self.assertIsNone(get_cache_timeout(page))
+            # django CMS 4+ with djangocms-timed-publishing
+            page = page.__class__.objects.get(pk=page.pk)
+            self.assertIsNone(get_cache_timeout(page))
+            with patch("djangocms_page_meta.utils.get_publication_dates", return_value=[now + timedelta(hours=2)]):
+                self.assertEqual(get_cache_timeout(page), 7200)
+
+    def test_cache_timeout_entries(self):
+        """
+        Entries of scheduled pages expire at the next publication boundary
+        """
+        page, __ = self.get_pages()
+        page.publication_end_date = timezone.now() + timedelta(seconds=60)
+        get_page_meta(page, "en")
+        for key in (get_page_cache_key(page), get_cache_key(page, "en")):
+            expiry = cache._expire_info[cache.make_key(key)]
+            self.assertAlmostEqual(expiry, time.time() + 60, delta=5)
+
+    def test_cache_key_schema_version(self):
+        page, __ = self.get_pages()
+        meta = get_page_meta(page, "en")
+        key = get_cache_key(page, "en")
+        self.assertTrue(cache.get(key))
+        # django-meta settings are applied when reading: the cached entries are still valid
+        with override_settings(META_TWITTER_SITE="@other_site", META_SITE_DOMAIN="other.example.com"):
+            self.assertEqual(get_cache_key(page, "en"), key)
+            with self.assertNumQueries(0):
+                meta = get_page_meta(page, "en")
+            self.assertEqual(meta.twitter_site, "@other_site")
+            self.assertEqual(meta.url, "http://other.example.com/en/page-one/")
+        self.assertEqual(get_cache_key(page, "en"), key)
+        with override_settings(PAGE_META_DESCRIPTION_LENGTH=10):
+            self.assertEqual(get_cache_key(page, "en"), key)
+        # a new cache layout switches to a fresh namespace
+        self.addCleanup(get_schema_fingerprint.cache_clear)
+        get_schema_fingerprint.cache_clear()
+        with patch("djangocms_page_meta.utils.CACHE_SCHEMA_VERSION", CACHE_SCHEMA_VERSION + 1):
+            self.assertNotEqual(get_cache_key(page, "en"), key)
+
+    def test_slow_build_log(self):
+        page, __ = self.get_pages()
+        models.PageMeta.objects.create(extended_object=page)
+        page.reload()
+        with override_settings(PAGE_META_SLOW_BUILD_THRESHOLD=0.000001):
+            with self.assertLogs("djangocms_page_meta.utils", "WARNING") as logs:
+                get_page_meta(page, "en")
+            build = logs.records[0].page_meta_build
+            self.assertEqual(build["page"], page.pk)
+            self.assertEqual(build["language"], "en")
+            self.assertEqual(build["site"], page.site_id)
+            self.assertIn("pagemeta", build["phases"])
+            self.assertTrue(build["queries"])
+
+            # cache hits are not logged
+            with self.assertNoLogs("djangocms_page_meta.utils", "WARNING"):
+                get_page_meta(page, "en")
+
+        cache.clear()
+        with override_settings(PAGE_META_SLOW_BUILD_THRESHOLD=60000):
+            with self.assertNoLogs("djangocms_page_meta.utils", "WARNING"):
+                get_page_meta(page, "en")
+
     def test_tags(self):
         tags1 = ("pagetag.1", "pagetag.2")
         tags2 = ("titletag.1", "titletag.2")
@@ -178,6 +471,65 @@ class PageMetaUtilsTest(BaseTest):
         for tag in tags2:
             self.assertTrue(tag in meta2.tag)
 
+        # page and title tags are fetched with a single query
+        self.assertEqual(
+            get_tags_many([page1.pk]),
+            {page1.pk: {None: list(tags1), "en": list(tags2)}},
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            title_ext.tags.remove(tags2[0])
+        meta2 = get_page_meta(page2, "en")
+        self.assertFalse(tags2[0] in meta2.tag)
+        self.assertTrue(tags2[1] in meta2.tag)
+
+    def test_tags_articles_only(self):
+        page1, __ = self.get_pages()
+        tags = {page1.pk: {None: ["pagetag"], "en": ["titletag"]}}
+        with patch("djangocms_page_meta.utils.get_tags_many", return_value=tags) as get_tags_many:
+            self.assertFalse(hasattr(get_page_meta(page1, "en"), "tag"))
+            get_tags_many.assert_not_called()
+            self.assertNotIn("_tags", cache.get(get_cache_key(page1, "en")))
+
+            # the cached language-dependent entry is completed once the page becomes an article
+            with self.captureOnCommitCallbacks(execute=True):
+                models.PageMeta.objects.create(extended_object=page1, og_type="article")
+            page1 = page1.__class__.objects.get(pk=page1.pk)
+            self.assertEqual(get_page_meta(page1, "en").tag, "titletag,pagetag")
+            self.assertEqual(get_tags_many.call_count, 1)
+            self.assertEqual(get_page_meta(page1, "en").tag, "titletag,pagetag")
+            self.assertEqual(get_tags_many.call_count, 1)
+
+    def test_tags_reverse_changes(self):
+        page_tags, title_tags = Mock(), Mock()
+        tag = Mock()
+        with patch("djangocms_page_meta.models.get_page_tags_models", return_value=(page_tags, title_tags)):
+            with patch("djangocms_page_meta.models._invalidate_tags") as invalidate:
+                # tag.pagetags_set.add(extension)
+                models.cleanup_tags(
+                    None, tag, action="post_add", reverse=True, model=page_tags, pk_set={1, 2}, using="default"
+                )
+                page_tags.objects.filter.assert_called_once_with(pk__in={1, 2})
+                invalidate.assert_called_once_with(
+                    page_tags=page_tags.objects.filter.return_value.select_related.return_value, using="default"
+                )
+                invalidate.reset_mock()
+                # tag.titletags_set.clear()
+                models.cleanup_tags(None, tag, action="post_clear", reverse=True, model=title_tags, pk_set=None)
+                invalidate.assert_not_called()
+                models.cleanup_tags(
+                    None, tag, action="pre_clear", reverse=True, model=title_tags, pk_set=None, using="default"
+                )
+                title_tags.objects.filter.assert_called_once_with(tags=tag)
+                invalidate.assert_called_once_with(
+                    title_tags=title_tags.objects.filter.return_value.select_related.return_value, using="default"
+                )
+
+    def test_tags_not_installed(self):
+        page1, __ = self.get_pages()
+        with patch("djangocms_page_meta.utils.get_page_tags_models", return_value=None):
+            with self.assertNumQueries(0):
+                self.assertIsNone(get_tags_many([page1.pk]))
+
     def test_custom_extra(self):
         page1, __ = self.get_pages()
         page_meta = models.PageMeta.objects.create(extended_object=page1)
@@ -257,8 +609,9 @@ class PageMetaUtilsTest(BaseTest):
         Meta caches are emptied when updating / deleting a meta
         """
         page1, __ = self.get_pages()
-        page_meta = models.PageMeta.objects.create(extended_object=page1)
-        title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"))
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta = models.PageMeta.objects.create(extended_object=page1)
+            title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"))
 
         # cache objects
         for language in page1.get_languages():
@@ -266,44 +619,52 @@ class PageMetaUtilsTest(BaseTest):
         title_key = get_cache_key(title_meta.extended_object.page, title_meta.extended_object.language)
         self.assertTrue(cache.get(title_key))
 
-        # Title update check
-        title_meta.description = "Something"
-        title_meta.save()
+        # Title update check: entries are deleted on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            title_meta.description = "Something"
+            title_meta.save()
+            self.assertTrue(cache.get(title_key))
         self.assertIsNone(cache.get(title_key))
 
         # Refreshing cache
         get_page_meta(page1, title_meta.extended_object.language)
         self.assertTrue(cache.get(title_key))
 
-        # Page update check
-        page_meta.og_author_url = "Something"
-        page_meta.save()
-        self.assertIsNone(cache.get(title_key))
+        # Page update check: language-dependent entries are kept
+        page_key = get_page_cache_key(page1)
+        self.assertTrue(cache.get(page_key) is not None)
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta.og_app_id = "Something"
+            page_meta.save()
+        self.assertIsNone(cache.get(page_key))
+        self.assertTrue(cache.get(title_key))
 
         # Refreshing cache
-        get_page_meta(page1, title_meta.extended_object.language)
-        self.assertTrue(cache.get(title_key))
+        meta = get_page_meta(page1, title_meta.extended_object.language)
+        self.assertEqual(meta.og_app_id, "Something")
+        self.assertTrue(cache.get(page_key) is not None)
 
         # Check deleting objects
-        title_meta.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            title_meta.delete()
         self.assertIsNone(cache.get(title_key))
 
-        page_meta.delete()
-        for language in page1.get_languages():
-            title_key = get_cache_key(page1, language)
-            self.assertIsNone(cache.get(title_key))
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta.delete()
+        self.assertIsNone(cache.get(page_key))
 
     def test_cache_cleanup_on_update_delete_page(self):
         """
         Meta caches are emptied when deleting a page.
         """
         page1, __ = self.get_pages()
-        page_meta = models.PageMeta.objects.create(extended_object=page1)
-        title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"))
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta = models.PageMeta.objects.create(extended_object=page1)
+            title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"))
 
         # cache objects - cache keys must be pre calculated as the page will not exist anymore when running the
         # asserts
-        meta_cache_keys = []
+        meta_cache_keys = [get_page_cache_key(page1)]
         for language in page1.get_languages():
             get_page_meta(page1, language)
             meta_cache_keys.append(get_cache_key(page1, language))
@@ -311,13 +672,284 @@ class PageMetaUtilsTest(BaseTest):
         self.assertTrue(cache.get(title_key))
 
         # Check deleting objects
-        title_meta.extended_object.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            title_meta.extended_object.delete()
         self.assertIsNone(cache.get(title_key))
 
-        page_meta.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta.delete()
+        self.assertIsNone(cache.get(meta_cache_keys[0]))
+
+        # Check deleting the page
+        page1 = page1.__class__.objects.get(pk=page1.pk)
+        for language in page1.get_languages():
+            get_page_meta(page1, language)
+        with self.captureOnCommitCallbacks(execute=True):
+            page1.delete()
         for title_key in meta_cache_keys:
             self.assertIsNone(cache.get(title_key))
 
+    def test_get_page_meta_many(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "it"), description="italiano")
+            models.PageMeta.objects.create(extended_object=page2, og_type="article")
+            children = [create_page("child %s" % idx, "page_meta.html", "en", parent=page2) for idx in range(4)]
+
+        def fetch(pages, language):
+            pages = [page.__class__.objects.get(pk=page.pk) for page in pages]
+            with CaptureQueriesContext(connection) as queries:
+                metas = get_page_meta_many(pages, language)
+            cache.clear()
+            return metas, len(queries)
+
+        fetch([page1, page2], "it")  # warm up the process-wide caches (sites, content types)
+        metas, few_queries = fetch([page1, page2], "it")
+        __, many_queries = fetch([page1, page2, *children], "it")
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual([meta.description for meta in metas], ["italiano", None])
+        self.assertEqual(metas[1].og_type, "article")
+
+        pages = [page1, children[0], page2, children[0]]
+        metas = get_page_meta_many(pages, "it")
+        self.assertEqual([meta.url for meta in metas], [get_page_meta(page, "it").url for page in pages])
+        # children only exist in english: their entries are aliases of the english ones
+        self.assertEqual(metas[1].title, "child 0")
+        page_cache = get_cache()
+        with self.assertNumQueries(0):
+            with patch.object(page_cache, "get_many", wraps=page_cache.get_many) as get_many:
+                metas = get_page_meta_many(pages, "it")
+        # one request for the entries, one for the fallback language entries the children are aliases of
+        self.assertEqual(get_many.call_count, 2)
+        self.assertEqual(metas[1].title, "child 0")
+
+    def test_get_page_meta_many_none(self):
+        page, __ = self.get_pages()
+        request = self.get_page_request(page, AnonymousUser(), "/")
+        metas = get_page_meta_many([page, None, SimpleLazyObject(lambda: None)], "en", request)
+        self.assertEqual(metas[0].title, get_page_meta(page, "en").title)
+        self.assertEqual(metas[1:], [None, None])
+
+    def test_get_page_meta_many_builds(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            models.PageMeta.objects.create(extended_object=page2, og_type="article")
+        pages = [page.__class__.objects.get(pk=page.pk) for page in (page1, page2)]
+        get_page_meta_many(pages, "en")
+        cache.clear()
+
+        resolved = []
+
+        def receiver(sender, page, timings, queries, **kwargs):
+            resolved.append((page, timings, queries))
+
+        page_meta_resolved.connect(receiver)
+        self.addCleanup(page_meta_resolved.disconnect, receiver)
+        pages = [page.__class__.objects.get(pk=page.pk) for page in (page1, page2)]
+        with override_settings(PAGE_META_SLOW_BUILD_THRESHOLD=0.000001):
+            with self.assertLogs("djangocms_page_meta.utils", "WARNING") as logs:
+                with CaptureQueriesContext(connection) as queries:
+                    get_page_meta_many(pages, "en")
+        self.assertEqual([build.page_meta_build["page"] for build in logs.records], [page1.pk, page2.pk])
+        self.assertEqual([page for page, __, __ in resolved], pages)
+        for __, timings, __ in resolved:
+            self.assertIn("title", timings)
+        # the queries of the bulk requests are reported once
+        self.assertEqual(sum(len(page_queries) for __, __, page_queries in resolved), len(queries))
+
+    def test_get_page_meta_many_draft(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(page2, "en"), description="english")
+            children = [create_page("child %s" % idx, "page_meta.html", "en", parent=page2) for idx in range(4)]
+        request = self.get_page_request(page1, self.user, "/")
+        request.toolbar = Mock(edit_mode_active=True, preview_mode_active=False)
+        request.toolbar.get_object.return_value = None
+
+        def fetch(pages):
+            pages = [page.__class__.objects.get(pk=page.pk) for page in pages]
+            with CaptureQueriesContext(connection) as queries:
+                metas = get_page_meta_many(pages, "en", request)
+            return metas, len(queries)
+
+        fetch([page1, page2])  # warm up the process-wide caches (sites, content types)
+        metas, few_queries = fetch([page1, page2])
+        __, many_queries = fetch([page1, page2, *children])
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual([meta.description for meta in metas], [None, "english"])
+        self.assertIsNone(cache.get(get_cache_key(page2, "en")))
+
+    def test_cache_cleanup_on_move(self):
+        """
+        Moving a page invalidates the URL-dependent entries of its subtree
+        """
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            child = create_page("child", "page_meta.html", "en", parent=page2)
+        for page in (page1, page2, child):
+            get_page_meta(page, "en")
+        self.assertEqual(get_page_meta(child, "en").url, "http://example.com/en/page-two/child/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            page2.move_page(page1, "last-child")
+            request = self.get_page_request(page2, self.user, "/")
+            send_post_page_operation(request=request, operation=MOVE_PAGE, token=None, obj=page2)
+        self.assertTrue(cache.get(get_cache_key(page1, "en")))
+        self.assertTrue(cache.get(get_page_cache_key(page2)))
+        self.assertIsNone(cache.get(get_cache_key(page2, "en")))
+        self.assertIsNone(cache.get(get_cache_key(child, "en")))
+        self.assertIsNone(cache.get(get_cache_key(child, "it")))
+        child = child.__class__.objects.get(pk=child.pk)
+        self.assertEqual(get_page_meta(child, "en").url, "http://example.com/en/page-one/page-two/child/")
+
+    def test_cache_cleanup_on_delete_tree(self):
+        """
+        Deleting a page tree invalidates the entries of all the pages at once
+        """
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            child = create_page("child", "page_meta.html", "en", parent=page2)
+            grandchild = create_page("grandchild", "page_meta.html", "en", parent=child)
+            models.PageMeta.objects.create(extended_object=child)
+            title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(grandchild, "en"))
+            models.GenericMetaAttribute.objects.create(title=title_meta, attribute="name", name="custom", value="attr")
+        for page in (page1, page2, child, grandchild):
+            get_page_meta(page, "en")
+        invalidations = []
+
+        def receiver(sender, source, keys, **kwargs):
+            invalidations.append((source, keys))
+
+        page_meta_invalidated.connect(receiver)
+        self.addCleanup(page_meta_invalidated.disconnect, receiver)
+
+        page2 = page2.__class__.objects.get(pk=page2.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            page2.delete()
+        self.assertEqual([source for source, __ in invalidations], ["cleanup_page"])
+        for page in (page2, child, grandchild):
+            self.assertIn(get_page_cache_key(page), invalidations[0][1])
+            self.assertIsNone(cache.get(get_cache_key(page, "en")))
+        self.assertIn(get_index_cache_key(page1.site_id), invalidations[0][1])
+        self.assertEqual(len(invalidations[0][1]), 13)
+        self.assertTrue(cache.get(get_cache_key(page1, "en")))
+
+    def test_cache_cleanup_on_image_change(self):
+        """
+        Changing a filer file invalidates the entries of the pages using it
+        """
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            image = self.create_filer_image_object()
+            models.PageMeta.objects.create(extended_object=page1, image=image)
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(page2, "it"), image=image)
+        for page in (page1, page2):
+            for language in ("en", "it"):
+                get_page_meta(page, language)
+        self.assertEqual(cache.get(get_default_image_cache_key()), "")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        self.assertIsNone(cache.get(get_page_cache_key(page1)))
+        self.assertIsNone(cache.get(get_cache_key(page2, "it")))
+        self.assertTrue(cache.get(get_page_cache_key(page2)))
+        self.assertTrue(cache.get(get_cache_key(page1, "it")))
+        self.assertTrue(cache.get(get_cache_key(page2, "en")))
+        self.assertEqual(cache.get(get_default_image_cache_key()), "")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            default_meta_image = models.DefaultMetaImage.objects.first()
+            default_meta_image.image = image
+            default_meta_image.save()
+        get_page_meta(page2, "en")
+        self.assertTrue(cache.get(get_default_image_cache_key()))
+        # the extensions using the file are deleted (cascade) and invalidate their entries; the default meta image
+        # is set to null, without signals, and is invalidated by the file deletion
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertIsNone(cache.get(get_default_image_cache_key()))
+        self.assertIsNone(cache.get(get_cache_key(page2, "it")))
+
+    def test_invalidation_batch(self):
+        """
+        Invalidations are collected in the transaction and processed once on commit
+        """
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta = models.PageMeta.objects.create(extended_object=page)
+            title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"))
+        get_page_meta(page, "en")
+        page_key, title_key = get_page_cache_key(page), get_cache_key(page, "en")
+        invalidations = []
+
+        def receiver(sender, source, keys, **kwargs):
+            invalidations.append((source, keys))
+
+        page_meta_invalidated.connect(receiver)
+        self.addCleanup(page_meta_invalidated.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            page_meta.save()
+            page_meta.save()
+            title_meta.save()
+            self.assertTrue(cache.get(page_key))
+            self.assertTrue(cache.get(title_key))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(invalidations, [("cleanup_pagemeta", [page_key]), ("cleanup_titlemeta", [title_key])])
+        self.assertIsNone(cache.get(page_key))
+        self.assertIsNone(cache.get(title_key))
+
+        # rolled back changes do not invalidate the cache
+        get_page_meta(page, "en")
+        invalidations.clear()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    page_meta.save()
+                    raise ValueError
+            title_meta.save()
+        self.assertEqual(invalidations, [("cleanup_titlemeta", [title_key])])
+        self.assertTrue(cache.get(page_key))
+
+        # changes in released savepoints are kept
+        get_page_meta(page, "en")
+        invalidations.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                page_meta.save()
+            title_meta.save()
+        self.assertEqual(sorted(source for source, __ in invalidations), ["cleanup_pagemeta", "cleanup_titlemeta"])
+        self.assertIsNone(cache.get(page_key))
+        self.assertIsNone(cache.get(title_key))
+
+    def test_invalidation_batch_database(self):
+        """
+        Invalidations are bound to the transaction of the database the change is written to
+        """
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta = models.PageMeta.objects.create(extended_object=page)
+        get_page_meta(page, "en")
+        page_key = get_page_cache_key(page)
+        get_connection = transaction.get_connection
+        other = Mock(alias="other", in_atomic_block=False)
+
+        def get_database_connection(using=None):
+            return other if using == "other" else get_connection(using)
+
+        with patch("djangocms_page_meta.models.transaction.get_connection", side_effect=get_database_connection):
+            with self.captureOnCommitCallbacks() as callbacks:
+                post_save.send(sender=models.PageMeta, instance=page_meta, created=False, using="other")
+                self.assertIsNone(cache.get(page_key))
+            self.assertEqual(callbacks, [])
+
+            get_page_meta(page, "en")
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                post_save.send(sender=models.PageMeta, instance=page_meta, created=False, using="default")
+                self.assertTrue(cache.get(page_key))
+            self.assertEqual(len(callbacks), 1)
+            self.assertIsNone(cache.get(page_key))
+
     def test_form(self):
         page1, __ = self.get_pages()
         page_meta = models.PageMeta.objects.create(extended_object=page1)
@@ -0,0 +1,55 @@
+from cms.api import create_page
+from django.test import override_settings
+from menus.menu_pool import menu_pool
+
+from djangocms_page_meta import models
+from djangocms_page_meta.cms_menus import PageMetaModifier
+
+from . import BaseTest
+
+
+class PageMetaModifierTest(BaseTest):
+    def _get_nodes(self, page, **kwargs):
+        request = self.get_page_request(page, self.user, "/")
+        renderer = menu_pool.get_renderer(request)
+        nodes = renderer.get_nodes(**kwargs)
+        return request, renderer, nodes
+
+    @override_settings(PAGE_META_MENU_FIELDS=("description", "url"))
+    def test_post_cut(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            child = create_page("child", "page_meta.html", "en", parent=page2)
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(child, "en"), description="child page")
+        request, renderer, nodes = self._get_nodes(page1)
+        roots = [node for node in nodes if not node.parent]
+        PageMetaModifier(renderer).modify(request, roots, None, None, True, False)
+        attrs = {node.id: node.attr["page_meta"] for node in nodes}
+        self.assertEqual(
+            attrs[child.pk], {"description": "child page", "url": "http://example.com/en/page-two/child/"}
+        )
+        self.assertIsNone(attrs[page1.pk]["description"])
+
+        # only the pages are fetched from the database afterwards
+        request, renderer, nodes = self._get_nodes(page1)
+        roots = [node for node in nodes if not node.parent]
+        with self.assertNumQueries(1):
+            PageMetaModifier(renderer).modify(request, roots, None, None, True, False)
+        self.assertEqual({node.id: node.attr["page_meta"] for node in nodes}, attrs)
+
+    @override_settings(PAGE_META_MENU_FIELDS=("description",))
+    def test_breadcrumb(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            child = create_page("child", "page_meta.html", "en", parent=page2)
+        request, renderer, nodes = self._get_nodes(child, breadcrumb=True)
+        nodes = PageMetaModifier(renderer).modify(request, nodes, None, None, False, True)
+        marked = {node.id for node in nodes if "page_meta" in node.attr}
+        self.assertEqual(marked, {child.pk, page2.pk})
+
+    def test_disabled(self):
+        page1, __ = self.get_pages()
+        request, renderer, nodes = self._get_nodes(page1)
+        with self.assertNumQueries(0):
+            PageMetaModifier(renderer).modify(request, nodes, None, None, True, False)
+        self.assertFalse(any("page_meta" in node.attr for node in nodes))
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from djangocms_page_meta import metrics, models
+from djangocms_page_meta.signals import add_query_consumer, page_meta_resolved, remove_query_consumer
+from djangocms_page_meta.utils import get_page_meta
+from djangocms_page_meta.views import PROMETHEUS_CONTENT_TYPE, metrics as metrics_view
+
+from . import BaseTest
+
+
+class MetricsTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        metrics.connect()
+        self.addCleanup(metrics.disconnect)
+
+    def test_lookups(self):
+        page, __ = self.get_pages()
+        get_page_meta(page, "en")
+        get_page_meta(page, "en")
+        get_page_meta(page, "it")
+
+        text = metrics.get_metrics_text()
+        self.assertIn('djangocms_page_meta_lookups_total{result="hit"} 1\n', text)
+        self.assertIn('djangocms_page_meta_lookups_total{result="miss"} 2\n', text)
+        self.assertIn('djangocms_page_meta_build_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn("djangocms_page_meta_build_seconds_count 2\n", text)
+        self.assertIn("# TYPE djangocms_page_meta_build_seconds histogram\n", text)
+
+    def test_no_query_capture(self):
+        page, __ = self.get_pages()
+        lookups = []
+
+        def receiver(sender, queries, **kwargs):
+            lookups.append(queries)
+
+        page_meta_resolved.connect(receiver)
+        self.addCleanup(page_meta_resolved.disconnect, receiver)
+        # metrics only use hits and timings: queries are not captured
+        get_page_meta(page, "en")
+        self.assertEqual(lookups, [[]])
+
+        add_query_consumer(self)
+        self.addCleanup(remove_query_consumer, self)
+        cache.clear()
+        get_page_meta(page.__class__.objects.get(pk=page.pk), "en")
+        self.assertTrue(lookups[1])
+
+    def test_invalidations(self):
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta = models.PageMeta.objects.create(extended_object=page)
+            title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"))
+        metrics.reset()
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            page_meta.save()
+            title_meta.save()
+
+        text = metrics.get_metrics_text()
+        self.assertIn('djangocms_page_meta_invalidations_total{receiver="cleanup_pagemeta"} 2\n', text)
+        self.assertIn('djangocms_page_meta_invalidations_total{receiver="cleanup_titlemeta"} 1\n', text)
+        self.assertIn('djangocms_page_meta_invalidations_total{receiver="cleanup_page"} 0\n', text)
+        self.assertIn('djangocms_page_meta_invalidation_batch_size_bucket{le="1"} 3\n', text)
+        self.assertIn("djangocms_page_meta_invalidation_batch_size_sum 3.0\n", text)
+
+    def test_reset(self):
+        page, __ = self.get_pages()
+        get_page_meta(page, "en")
+        metrics.reset()
+        text = metrics.get_metrics_text()
+        self.assertIn('djangocms_page_meta_lookups_total{result="miss"} 0\n', text)
+
+    def test_view(self):
+        page, __ = self.get_pages()
+        get_page_meta(page, "en")
+        response = metrics_view(RequestFactory().get("/metrics/"))
+        self.assertEqual(response["Content-Type"], PROMETHEUS_CONTENT_TYPE)
+        self.assertContains(response, 'djangocms_page_meta_lookups_total{result="miss"} 1')
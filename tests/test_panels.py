@@ -0,0 +1,88 @@
+import threading
+from unittest.mock import MagicMock
+
+from djangocms_page_meta import models
+from djangocms_page_meta.signals import has_query_consumers
+from djangocms_page_meta.utils import get_cache_key, get_page_cache_key, get_page_meta
+
+from . import BaseTest
+
+
+class PageMetaPanelTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        try:
+            from djangocms_page_meta.panels import PageMetaPanel
+        except ImportError:
+            self.skipTest("django-debug-toolbar not installed")
+        self.toolbar = MagicMock(stats={})
+        self.panel = PageMetaPanel(self.toolbar, lambda request: None)
+
+    def test_lookups_recorded(self):
+        page, __ = self.get_pages()
+        models.PageMeta.objects.create(extended_object=page, og_type="article")
+        page.reload()
+
+        self.panel.enable_instrumentation()
+        try:
+            get_page_meta(page, "en")
+            get_page_meta(page, "en")
+        finally:
+            self.panel.disable_instrumentation()
+        get_page_meta(page, "it")
+
+        self.panel.generate_stats(None, None)
+        stats = self.panel.get_stats()
+        self.assertEqual(len(stats["lookups"]), 2)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        miss, hit = stats["lookups"]
+        self.assertEqual(miss["keys"], [get_page_cache_key(page), get_cache_key(page, "en")])
+        self.assertFalse(miss["hit"])
+        self.assertTrue(miss["queries"])
+        self.assertIn("pagemeta", miss["timings"])
+        self.assertEqual(miss["fields"]["og_type"], repr("article"))
+        self.assertTrue(miss["size"])
+        self.assertTrue(hit["hit"])
+        self.assertFalse(hit["queries"])
+        self.assertEqual(self.panel.nav_subtitle, "2 lookups, 1 misses")
+
+    def test_other_threads_ignored(self):
+        page, __ = self.get_pages()
+        get_page_meta(page, "en")
+        lookups = []
+
+        def lookup():
+            lookups.append(has_query_consumers())
+            lookups.append(get_page_meta(page, "en").title)
+
+        self.panel.enable_instrumentation()
+        try:
+            thread = threading.Thread(target=lookup)
+            thread.start()
+            thread.join()
+            self.assertTrue(has_query_consumers())
+        finally:
+            self.panel.disable_instrumentation()
+        self.assertEqual(lookups, [False, "page one"])
+        self.assertFalse(has_query_consumers())
+
+        self.panel.generate_stats(None, None)
+        self.assertEqual(self.panel.get_stats()["lookups"], [])
+
+    def test_toolbar_recorded(self):
+        from cms.toolbar.toolbar import CMSToolbar
+
+        page, __ = self.get_pages()
+        request = self.get_page_request(page, self.user, "/", edit=True)
+
+        self.panel.enable_instrumentation()
+        try:
+            CMSToolbar(request).get_left_items()
+        finally:
+            self.panel.disable_instrumentation()
+
+        self.panel.generate_stats(request, None)
+        toolbars = self.panel.get_stats()["toolbars"]
+        self.assertEqual(len(toolbars), 1)
+        self.assertTrue(toolbars[0]["queries"])
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+from cms.api import create_page
+from django.core.cache import cache
+from django.test import override_settings
+
+from djangocms_page_meta import models
+from djangocms_page_meta.models import invalidate_page_tree
+from djangocms_page_meta.refresh import refresh_page
+from djangocms_page_meta.utils import get_cache_key, get_default_image_cache_key, get_page_cache_key, get_page_meta
+
+from . import BaseTest
+
+
+class WriteThroughTest(BaseTest):
+    @override_settings(PAGE_META_WRITE_THROUGH="sync")
+    def test_sync(self):
+        page, __ = self.get_pages()
+        get_page_meta(page, "en")
+        with self.captureOnCommitCallbacks(execute=True):
+            title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"))
+            title_meta.description = "english"
+            title_meta.save()
+        self.assertEqual(cache.get(get_cache_key(page, "en"))["description"], "english")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.PageMeta.objects.create(extended_object=page, og_type="article")
+        self.assertEqual(cache.get(get_page_cache_key(page))["og_type"], "article")
+
+        with self.assertNumQueries(0):
+            meta = get_page_meta(page, "en")
+        self.assertEqual(meta.description, "english")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.DefaultMetaImage.objects.first().save()
+        self.assertEqual(cache.get(get_default_image_cache_key()), "")
+
+    @override_settings(PAGE_META_WRITE_THROUGH="sync")
+    def test_sync_invalidated_only(self):
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            models.PageMeta.objects.create(extended_object=page, og_type="article")
+            title_meta = models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"))
+        get_page_meta(page, "en")
+        page_entry = cache.get(get_page_cache_key(page))
+
+        # the language-independent entry is read from the cache to check whether the page is an article
+        with patch("djangocms_page_meta.utils._build_page_overlay") as build_page_overlay:
+            with self.captureOnCommitCallbacks(execute=True):
+                title_meta.description = "english"
+                title_meta.save()
+        build_page_overlay.assert_not_called()
+        self.assertEqual(cache.get(get_page_cache_key(page)), page_entry)
+        self.assertEqual(cache.get(get_cache_key(page, "en"))["description"], "english")
+
+    @override_settings(PAGE_META_WRITE_THROUGH="sync")
+    def test_sync_page_tree(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            child = create_page("child", "page_meta.html", "en", parent=page2)
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_page_tree(page2)
+        for page in (page2, child):
+            for language in ("en", "it", "fr-fr"):
+                self.assertTrue(cache.get(get_cache_key(page, language)))
+        self.assertIsNone(cache.get(get_cache_key(page1, "en")))
+
+    @override_settings(PAGE_META_WRITE_THROUGH="sync")
+    def test_sync_image(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            image = self.create_filer_image_object()
+            models.PageMeta.objects.create(extended_object=page1, image=image)
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(page2, "it"), image=image)
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        self.assertTrue(cache.get(get_page_cache_key(page1))["image"])
+        self.assertTrue(cache.get(get_cache_key(page2, "it"))["image"])
+        self.assertIsNone(cache.get(get_cache_key(page1, "it")))
+
+    def test_background(self):
+        page, __ = self.get_pages()
+        with override_settings(PAGE_META_WRITE_THROUGH="background"):
+            with patch("djangocms_page_meta.refresh.get_executor") as get_executor:
+                with self.captureOnCommitCallbacks(execute=True):
+                    models.PageMeta.objects.create(extended_object=page)
+        get_executor.return_value.submit.assert_called_once()
+        func, args = get_executor.return_value.submit.call_args[0][1:3]
+        self.assertEqual((func, args), (refresh_page, (page.pk, ())))
+
+    def test_disabled(self):
+        page, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            models.PageMeta.objects.create(extended_object=page)
+        self.assertIsNone(cache.get(get_page_cache_key(page)))
@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+from cms.api import create_page
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from djangocms_page_meta import models, snapshot
+from djangocms_page_meta.utils import get_page_meta
+
+from . import BaseTest
+
+
+@override_settings(PAGE_META_SNAPSHOT=True, PAGE_META_SNAPSHOT_CHECK_INTERVAL=3600)
+class SnapshotTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        snapshot.connect()
+        self.addCleanup(snapshot.disconnect)
+        self.addCleanup(snapshot.clear_snapshot)
+        # run the rebuilds in the test thread
+        patcher = patch("djangocms_page_meta.snapshot.get_executor")
+        self.executor = patcher.start().return_value
+        self.executor.submit.side_effect = lambda run, func, args, background: func(*args)
+        self.addCleanup(patcher.stop)
+
+    def test_lookup(self):
+        page, __ = self.get_pages()
+        models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"), description="english")
+        current = snapshot.preload_snapshot()
+        self.assertEqual(len(current), 6)
+
+        with self.assertNumQueries(0):
+            meta = get_page_meta(page, "en")
+        self.assertEqual(meta.description, "english")
+        self.assertEqual(meta.url, "http://example.com/en/page-one/")
+        self.assertEqual(meta.twitter_type, "summary")
+        self.assertIs(snapshot.get_snapshot(), current)
+
+    def test_reload_on_invalidation(self):
+        page, __ = self.get_pages()
+        current = snapshot.preload_snapshot()
+        self.assertFalse(get_page_meta(page, "en").description)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.TitleMeta.objects.create(extended_object=self.get_title_obj(page, "en"), description="english")
+        self.assertEqual(snapshot.get_version(), current.version + 1)
+        self.assertEqual(get_page_meta(page, "en").description, "english")
+        self.assertIsNot(snapshot.get_snapshot(), current)
+
+    def test_build_queries(self):
+        page1, page2 = self.get_pages()
+        models.TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"), description="english")
+        models.PageMeta.objects.create(extended_object=page2, og_type="article")
+        snapshot.build_snapshot()  # warm up the process-wide caches (sites, content types)
+        with CaptureQueriesContext(connection) as few:
+            snapshot.build_snapshot()
+        for idx in range(5):
+            create_page("child %s" % idx, "page_meta.html", "en", parent=page2)
+        with CaptureQueriesContext(connection) as many:
+            current = snapshot.build_snapshot()
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(len(current), 21)
+
+    def test_version_check_interval(self):
+        page, __ = self.get_pages()
+        current = snapshot.preload_snapshot()
+        # version bumped by another process: not checked until the interval expires
+        snapshot.bump_version()
+        self.assertIs(snapshot.get_snapshot(), current)
+        with override_settings(PAGE_META_SNAPSHOT_CHECK_INTERVAL=0):
+            self.assertIsNot(snapshot.get_snapshot(), current)
+
+    def test_background_rebuild(self):
+        self.get_pages()
+        current = snapshot.preload_snapshot()
+        self.executor.submit.side_effect = None
+        snapshot.bump_version()
+        with override_settings(PAGE_META_SNAPSHOT_CHECK_INTERVAL=0):
+            # the previous snapshot is used until the new one is built, and the rebuild is scheduled once
+            self.assertIs(snapshot.get_snapshot(), current)
+            self.assertIs(snapshot.get_snapshot(), current)
+            self.executor.submit.assert_called_once()
+            run, func, args, background = self.executor.submit.call_args[0]
+            with self.assertNumQueries(0):
+                # the new snapshot is not built in the request thread
+                snapshot.get_snapshot()
+            func(*args)
+            self.assertEqual(snapshot.get_snapshot().version, current.version + 1)
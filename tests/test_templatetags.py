@@ -1,6 +1,12 @@
 from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.template import Context, Template
 
 from djangocms_page_meta.models import GenericMetaAttribute, PageMeta, TitleMeta
+from djangocms_page_meta.signals import page_meta_resolved
+from djangocms_page_meta.utils import LazyPageMeta, get_cache_key, get_page_cache_key, get_page_meta
 
 from . import BaseTest
 
@@ -196,3 +202,88 @@ class TemplateMetaTest(BaseTest):
         self.assertNotContains(
             response, '<meta property="og:url" content="http://example.com%s">' % page1.get_public_url("en")
         )
+
+    def _render(self, template, page, **context):
+        request = self.get_page_request(page, self.user, "/")
+        context.update(request=request, page=page)
+        return Template("{% load page_meta_tags %}" + template).render(Context(context))
+
+    def test_page_meta_lazy(self):
+        page1, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"), description="english")
+            PageMeta.objects.create(extended_object=page1, og_type="article")
+
+        # title fields are resolved from the language-dependent entry only
+        self.assertEqual(self._render("{% page_meta page as meta lazy %}{{ meta.description }}", page1), "english")
+        self.assertIsNotNone(cache.get(get_cache_key(page1, "en")))
+        self.assertIsNone(cache.get(get_page_cache_key(page1)))
+
+        request = self.get_page_request(page1, self.user, "/")
+        meta = LazyPageMeta(page1, "en", request)
+        self.assertEqual(meta.title, "page one")
+        self.assertEqual(meta.og_type, "article")
+        self.assertIs(meta._meta, get_page_meta(page1, "en", request))
+        self.assertEqual(meta.description, "english")
+
+    def test_page_meta_lazy_title(self):
+        page1, __ = self.get_pages()
+        resolved = []
+
+        def receiver(sender, page, language, keys, hit, meta, timings, **kwargs):
+            resolved.append((page, language, keys, hit, meta, timings))
+
+        page_meta_resolved.connect(receiver)
+        self.addCleanup(page_meta_resolved.disconnect, receiver)
+
+        request = self.get_page_request(page1, self.user, "/")
+        meta = LazyPageMeta(page1, "en", request)
+        # truth testing does not resolve the meta
+        self.assertTrue(meta)
+        self.assertFalse(LazyPageMeta(None, "en", request))
+        self.assertEqual(resolved, [])
+
+        # title-only lookups are reported as the full ones
+        self.assertEqual(meta.title, "page one")
+        self.assertEqual(len(resolved), 1)
+        page, language, keys, hit, title_meta, timings = resolved[0]
+        self.assertEqual((page, language, keys, hit), (page1, "en", [get_cache_key(page1, "en")], False))
+        self.assertIs(title_meta, meta._title_meta)
+        self.assertIn("cache", timings)
+        cache.clear()
+        self.assertIsNone(LazyPageMeta(page1, "en").description)
+        self.assertFalse(resolved[-1][3])
+        self.assertIsNone(LazyPageMeta(page1, "en").description)
+        self.assertTrue(resolved[-1][3])
+
+    def test_page_meta_field(self):
+        page1, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"), description="<english>")
+        self.assertEqual(self._render("{% page_meta_field page 'description' %}", page1), "&lt;english&gt;")
+        self.assertEqual(self._render("{% page_meta_field page 'title' as title %}[{{ title }}]", page1), "[page one]")
+        self.assertEqual(self._render("{% page_meta_field page 'missing' %}", page1), "")
+
+    def test_page_meta_field_memo(self):
+        page1, __ = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            TitleMeta.objects.create(extended_object=self.get_title_obj(page1, "en"), description="english")
+        template = "{% page_meta_field page 'description' %}|{% page_meta_field page 'title' %}"
+        self._render(template, page1)
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            self.assertEqual(self._render(template, page1), "english|page one")
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_page_meta_list(self):
+        page1, page2 = self.get_pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            TitleMeta.objects.create(extended_object=self.get_title_obj(page2, "en"), description="english")
+        self.assertEqual(
+            self._render(
+                "{% page_meta_list pages as metas %}"
+                "{% for page, meta in metas %}[{{ meta.description|default_if_none:'' }}]{% endfor %}",
+                page1,
+                pages=[page1, page2],
+            ),
+            "[][english]",
+        )
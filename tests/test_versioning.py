@@ -0,0 +1,69 @@
+import sys
+from types import ModuleType, SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.dispatch import Signal
+
+from djangocms_page_meta import models
+from djangocms_page_meta.utils import get_cache_key, get_index_cache_key, get_page_meta
+
+from . import BaseTest
+
+
+class VersioningTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        # djangocms-versioning is not a test dependency: provide the signal and constants used by the receiver
+        self.post_version_operation = Signal()
+        versioning = ModuleType("djangocms_versioning")
+        constants = ModuleType("djangocms_versioning.constants")
+        constants.OPERATION_PUBLISH = "operation_publish"
+        constants.OPERATION_UNPUBLISH = "operation_unpublish"
+        signals = ModuleType("djangocms_versioning.signals")
+        signals.post_version_operation = self.post_version_operation
+        versioning.constants = constants
+        versioning.signals = signals
+        modules = {
+            "djangocms_versioning": versioning,
+            "djangocms_versioning.constants": constants,
+            "djangocms_versioning.signals": signals,
+        }
+        patcher = patch.dict(sys.modules, modules)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with patch("djangocms_page_meta.models.apps.is_installed", return_value=True):
+            models.connect_versioning()
+
+    def test_publish_draft_extension(self):
+        page, __ = self.get_pages()
+        title = self.get_title_obj(page, "en")
+        self.assertFalse(get_page_meta(page, "en").description)
+        self.assertTrue(cache.get(get_index_cache_key(page.site_id)))
+
+        # draft changes do not touch the public entries
+        with patch("djangocms_page_meta.models.is_draft_content", return_value=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                title_meta = models.TitleMeta.objects.create(extended_object=title, description="english")
+                models.GenericMetaAttribute.objects.create(
+                    title=title_meta, attribute="name", name="custom", value="attr"
+                )
+        self.assertTrue(cache.get(get_cache_key(page, "en")))
+        self.assertTrue(cache.get(get_index_cache_key(page.site_id)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_version_operation.send(
+                sender=title.__class__, operation="operation_draft", obj=SimpleNamespace(content=title)
+            )
+        self.assertTrue(cache.get(get_cache_key(page, "en")))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_version_operation.send(
+                sender=title.__class__, operation="operation_publish", obj=SimpleNamespace(content=title)
+            )
+        self.assertIsNone(cache.get(get_cache_key(page, "en")))
+        self.assertIsNone(cache.get(get_index_cache_key(page.site_id)))
+        page = page.__class__.objects.get(pk=page.pk)
+        meta = get_page_meta(page, "en")
+        self.assertEqual(meta.description, "english")
+        self.assertIn(("name", "custom", "attr"), meta.extra_custom_props)